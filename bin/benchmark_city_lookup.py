@@ -0,0 +1,82 @@
+"""
+Compare nearest city lookups by coordinates (get_city_by_lat_and_lon) on
+growing city tables with and without the (lat, lon) index, on SQLite.
+
+Run with: python -m bin.benchmark_city_lookup
+"""
+
+import random
+import time
+from typing import List, Tuple
+
+from sqlalchemy import Engine, create_engine, insert, text
+from sqlalchemy.orm import Session
+
+# dependencies first, the repositories import it and it imports the services
+import city_pollution.dependencies  # noqa: F401
+from city_pollution.db.models.base import mapper_registry
+from city_pollution.db.models.city import city_table
+from city_pollution.db.repositories.city_repository import (
+    CityRepository,
+    city_by_lat_and_lon_statement,
+)
+
+LOOKUPS = 1000
+
+
+def make_engine(cities: int) -> Engine:
+    rng = random.Random(0)
+    engine = create_engine("sqlite://")
+    mapper_registry.metadata.create_all(engine)
+    rows = [
+        {
+            "name": f"City {i}",
+            "state": "",
+            "country": "",
+            "lat": rng.uniform(-60, 70),
+            "lon": rng.uniform(-180, 180),
+        }
+        for i in range(cities)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(city_table), rows)
+        connection.execute(text("ANALYZE"))
+    return engine
+
+
+def lookup_time(engine: Engine, points: List[Tuple[float, float]]) -> float:
+    with Session(engine) as db:
+        repo = CityRepository(db)
+        started = time.perf_counter()
+        for lat, lon in points:
+            repo.get_city_by_lat_and_lon(lat, lon)
+        return (time.perf_counter() - started) / len(points)
+
+
+def query_plan(engine: Engine) -> str:
+    statement = city_by_lat_and_lon_statement(45.0, 15.0, 0.01)
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "; ".join(row[-1] for row in rows)
+
+
+def main() -> None:
+    rng = random.Random(1)
+    points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(LOOKUPS)]
+    for cities in (1_000, 10_000, 100_000):
+        engine = make_engine(cities)
+        indexed = lookup_time(engine, points)
+        plan = query_plan(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_city_lat_lon"))
+        scan = lookup_time(engine, points)
+        print(
+            f"{cities} cities: with index {indexed * 1e6:.0f} us, "
+            f"without {scan * 1e6:.0f} us per lookup ({plan})"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare the row by row (iterrows) DataFrame to Pollution conversion with
+the columnar ones used by PollutionService.pandas_to_dataclasses and
+PollutionService.pandas_to_rows.
+
+Run with: python -m bin.benchmark_pandas_to_dataclasses
+"""
+
+import timeit
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from city_pollution.db.models.pollution import POLLUTANT_COLUMNS
+from city_pollution.dependencies import get_openweather_service
+from city_pollution.entities import Pollution
+from city_pollution.services.pollution import PollutionService
+
+
+def iterrows_to_dataclasses(df: pd.DataFrame, city_id: int) -> List[Pollution]:
+    pollutions = []
+    for index, row in df.iterrows():
+        pollution = Pollution(
+            co=row["co"],
+            no=row["no"],
+            no2=row["no2"],
+            o3=row["o3"],
+            so2=row["so2"],
+            pm2_5=row["pm2_5"],
+            pm10=row["pm10"],
+            nh3=row["nh3"],
+            date=row["date"],
+            city_id=city_id,
+        )
+        pollutions.append(pollution)
+    return pollutions
+
+
+def make_dataframe(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {column: rng.uniform(0, 100, rows) for column in POLLUTANT_COLUMNS}
+    )
+    start = date(1990, 1, 1)
+    df["date"] = [start + timedelta(days=i) for i in range(rows)]
+    return df
+
+
+def main() -> None:
+    service = PollutionService(get_openweather_service())
+    for rows in (10_000, 50_000):
+        df = make_dataframe(rows)
+        assert iterrows_to_dataclasses(df, 1) == service.pandas_to_dataclasses(df, 1)
+
+        iterrows_time = min(
+            timeit.repeat(lambda: iterrows_to_dataclasses(df, 1), number=1, repeat=3)
+        )
+        columnar_time = min(
+            timeit.repeat(
+                lambda: service.pandas_to_dataclasses(df, 1), number=1, repeat=3
+            )
+        )
+        rows_time = min(
+            timeit.repeat(lambda: service.pandas_to_rows(df, 1), number=1, repeat=3)
+        )
+        print(
+            f"{rows} rows: iterrows {iterrows_time * 1000:.1f} ms, "
+            f"columnar entities {columnar_time * 1000:.1f} ms "
+            f"(x{iterrows_time / columnar_time:.1f}), "
+            f"columnar rows {rows_time * 1000:.1f} ms "
+            f"(x{iterrows_time / rows_time:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare rendering pollution plots of growing date ranges with and without
+LTTB downsampling (settings.plot_max_points).
+
+Run with: python -m bin.benchmark_plot_downsampling
+"""
+
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+
+from city_pollution.config.settings import settings
+from city_pollution.db.models.pollution import POLLUTANT_COLUMNS
+from city_pollution.entities import Pollution
+from city_pollution.services.plot_renderer import (
+    pollution_series,
+    render_pollution_plot,
+)
+
+
+def make_pollution(days: int) -> List[Pollution]:
+    rng = np.random.default_rng(0)
+    values = {column: rng.uniform(0, 100, days) for column in POLLUTANT_COLUMNS}
+    start = date(2000, 1, 1)
+    return [
+        Pollution(
+            **{column: float(values[column][i]) for column in POLLUTANT_COLUMNS},
+            date=start + timedelta(days=i),
+            city_id=1,
+        )
+        for i in range(days)
+    ]
+
+
+def render_time(pollution: List[Pollution], max_points: int, path: str) -> float:
+    started = time.perf_counter()
+    dates, series = pollution_series(pollution)
+    render_pollution_plot(path, "benchmark", dates, series, max_points)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "plot.png")
+        # warm up matplotlib
+        render_time(make_pollution(10), 0, path)
+        for years in (1, 5, 20):
+            pollution = make_pollution(365 * years)
+            full = render_time(pollution, 0, path)
+            sampled = render_time(pollution, settings.plot_max_points, path)
+            print(
+                f"{years} years ({len(pollution)} days): all points {full * 1000:.0f} ms, "
+                f"downsampled to {settings.plot_max_points} points "
+                f"{sampled * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
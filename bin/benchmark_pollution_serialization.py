@@ -0,0 +1,113 @@
+"""
+Compare building and serializing a PollutionItemList response the old way,
+validating every row with PollutionItem.model_validate and encoding through
+jsonable_encoder and JSONResponse, with the fast path: a single TypeAdapter
+validation (pollution_items) and ORJSONModelResponse. model_construct on
+trusted rows is timed as well.
+
+Run with: python -m bin.benchmark_pollution_serialization
+"""
+
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# dependencies first, the repositories import it and it imports the services
+import city_pollution.dependencies  # noqa: F401
+from city_pollution.db.models.base import mapper_registry
+from city_pollution.db.repositories.pollution_repository import PollutionRepository
+from city_pollution.entities import City, Pollution
+from city_pollution.routers.responses import ORJSONModelResponse
+from city_pollution.schemas.city import City as CitySchema
+from city_pollution.schemas.pollution import (
+    PollutionItem,
+    PollutionItemList,
+    pollution_items,
+)
+from city_pollution.services.pollution import PollutionService
+
+REPEAT = 10
+
+
+def load_rows(days: int) -> List[Any]:
+    engine = create_engine("sqlite://")
+    mapper_registry.metadata.create_all(engine)
+    start = date(2000, 1, 1)
+    with sessionmaker(bind=engine)() as db:
+        db.add(City(id=1, name="City", state="", country="", lat=0.0, lon=0.0))
+        db.commit()
+        repo = PollutionRepository(db)
+        repo.create_pollution(
+            [
+                Pollution(
+                    co=i * 0.1,
+                    no=1.0,
+                    no2=2.0,
+                    o3=3.0,
+                    so2=4.0,
+                    pm2_5=5.0,
+                    pm10=6.0,
+                    nh3=7.0,
+                    date=start + timedelta(days=i),
+                    city_id=1,
+                )
+                for i in range(days)
+            ]
+        )
+        return repo.get_pollution_rows(start, start + timedelta(days=days), 1)
+
+
+def response(data: List[PollutionItem], rows: List[Any]) -> PollutionItemList:
+    city = CitySchema(
+        id=1, name="City", state="", country="", lat=0.0, lon=0.0, time_created=0
+    )
+    return PollutionItemList(
+        data=data, city=city, start=rows[0].date, end=rows[-1].date
+    )
+
+
+def model_validate_json_response(rows: List[Any]) -> bytes:
+    result = response([PollutionItem.model_validate(x) for x in rows], rows)
+    return JSONResponse(jsonable_encoder(result)).body
+
+
+def type_adapter_orjson_response(rows: List[Any]) -> bytes:
+    data = pollution_items(PollutionService().pollution_dicts(rows))
+    return ORJSONModelResponse(response(data, rows)).body
+
+
+def model_construct_orjson_response(rows: List[Any]) -> bytes:
+    data = [PollutionItem.model_construct(**x._asdict()) for x in rows]
+    return ORJSONModelResponse(response(data, rows)).body
+
+
+def best_time(build: Callable[[List[Any]], bytes], rows: List[Any]) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        build(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    for days in (365, 3650):
+        rows = load_rows(days)
+        timings = ", ".join(
+            f"{build.__name__} {best_time(build, rows) * 1000:.1f} ms"
+            for build in (
+                model_validate_json_response,
+                type_adapter_orjson_response,
+                model_construct_orjson_response,
+            )
+        )
+        print(f"{days} days: {timings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""pollution city_id date unique index
+
+Revision ID: 3b4c5d6e7f8a
+Revises: 2a3b4c5d6e7f
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b4c5d6e7f8a"
+down_revision: Union[str, None] = "2a3b4c5d6e7f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the latest row for every city and date before adding uniqueness
+    op.execute(
+        """
+        DELETE FROM pollution a
+        USING pollution b
+        WHERE a.city_id = b.city_id
+          AND a.date = b.date
+          AND a.id < b.id
+        """
+    )
+    op.create_index(
+        "ix_pollution_city_id_date",
+        "pollution",
+        ["city_id", "date"],
+        unique=True,
+    )
+    # The composite index covers lookups by city_id alone
+    op.drop_index("ix_pollution_city_id", table_name="pollution")
+
+
+def downgrade() -> None:
+    op.create_index("ix_pollution_city_id", "pollution", ["city_id"], unique=False)
+    op.drop_index("ix_pollution_city_id_date", table_name="pollution")
@@ -0,0 +1,40 @@
+"""geocoder cache
+
+Revision ID: 4c5d6e7f8a9b
+Revises: 3b4c5d6e7f8a
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c5d6e7f8a9b"
+down_revision: Union[str, None] = "3b4c5d6e7f8a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "geocoder_cache",
+        sa.Column("key", sa.String(length=512), nullable=False),
+        sa.Column("value", sa.JSON(), nullable=True),
+        sa.Column("expires_at", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_geocoder_cache_expires_at"),
+        "geocoder_cache",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_geocoder_cache_expires_at"), table_name="geocoder_cache")
+    op.drop_table("geocoder_cache")
@@ -0,0 +1,113 @@
+"""partition pollution by year
+
+Revision ID: 5d6e7f8a9b0c
+Revises: 4c5d6e7f8a9b
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from datetime import date
+from typing import Optional, Sequence, Union, cast
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d6e7f8a9b0c"
+down_revision: Union[str, None] = "4c5d6e7f8a9b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, co, no, no2, o3, so2, pm2_5, pm10, nh3, date, city_id"
+
+
+def create_pollution_table(partitioned: bool) -> None:
+    # the primary key of a partitioned table has to include the partition key
+    primary_key = "id, date" if partitioned else "id"
+    op.execute(
+        f"""
+        CREATE TABLE pollution (
+            id integer NOT NULL DEFAULT nextval('pollution_id_seq'::regclass),
+            co double precision NOT NULL,
+            no double precision NOT NULL,
+            no2 double precision NOT NULL,
+            o3 double precision NOT NULL,
+            so2 double precision,
+            pm2_5 double precision,
+            pm10 double precision,
+            nh3 double precision,
+            date date {"NOT NULL" if partitioned else ""},
+            city_id integer REFERENCES city (id) ON DELETE CASCADE,
+            CONSTRAINT pollution_pkey PRIMARY KEY ({primary_key})
+        ) {"PARTITION BY RANGE (date)" if partitioned else ""}
+        """
+    )
+
+
+def replace_pollution_table(partitioned: bool) -> None:
+    op.execute("ALTER TABLE pollution RENAME TO pollution_old")
+    op.execute(
+        "ALTER TABLE pollution_old RENAME CONSTRAINT pollution_pkey TO pollution_old_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_pollution_city_id_date RENAME TO ix_pollution_old_city_id_date"
+    )
+    create_pollution_table(partitioned)
+
+
+def drop_old_pollution_table() -> None:
+    # the id sequence has to outlive the old table
+    op.execute("ALTER SEQUENCE pollution_id_seq OWNED BY pollution.id")
+    op.execute("DROP TABLE pollution_old")
+    op.create_index(
+        "ix_pollution_city_id_date",
+        "pollution",
+        ["city_id", "date"],
+        unique=True,
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    replace_pollution_table(partitioned=True)
+
+    # a partition per stored year and up to the next one, later years are
+    # created by the application before their first insert
+    first, last = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT extract(year FROM min(date))::int, "
+                "extract(year FROM max(date))::int FROM pollution_old"
+            )
+        )
+        .one()
+    )
+    this_year = date.today().year
+    first_year = cast(Optional[int], first) or this_year
+    last_year = cast(Optional[int], last) or this_year
+    for year in range(min(first_year, this_year), max(last_year, this_year + 1) + 1):
+        op.execute(
+            f"CREATE TABLE pollution_y{year:04d} PARTITION OF pollution "
+            f"FOR VALUES FROM ('{date(year, 1, 1)}') TO ('{date(year + 1, 1, 1)}')"
+        )
+
+    # rows without a date can't be routed to a partition
+    op.execute(
+        f"INSERT INTO pollution ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM pollution_old WHERE date IS NOT NULL"
+    )
+    drop_old_pollution_table()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    replace_pollution_table(partitioned=False)
+    op.execute(f"INSERT INTO pollution ({COLUMNS}) SELECT {COLUMNS} FROM pollution_old")
+    # dropping the partitioned table drops its partitions
+    drop_old_pollution_table()
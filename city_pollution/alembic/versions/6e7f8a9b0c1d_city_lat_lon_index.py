@@ -0,0 +1,26 @@
+"""city lat lon index
+
+Revision ID: 6e7f8a9b0c1d
+Revises: 5d6e7f8a9b0c
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6e7f8a9b0c1d"
+down_revision: Union[str, None] = "5d6e7f8a9b0c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_city_lat_lon", "city", ["lat", "lon"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_city_lat_lon", table_name="city")
@@ -0,0 +1,32 @@
+"""data version
+
+Revision ID: 7f8a9b0c1d2e
+Revises: 6e7f8a9b0c1d
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7f8a9b0c1d2e"
+down_revision: Union[str, None] = "6e7f8a9b0c1d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "data_version",
+        sa.Column("city_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("city_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_version")
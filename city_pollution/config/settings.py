@@ -1,12 +1,15 @@
 from pathlib import Path
 from tempfile import gettempdir
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     fastapi_env: str = ""
     database_url: str = ""
+    async_database_url: str = ""
+    database_async: bool = True
     postgres_name: str = ""
     postgres_user: str = ""
     postgres_host: str = ""
@@ -18,6 +21,34 @@ class Settings(BaseSettings):
     openweather_key: str = ""
     temp_dir: Path = Path(gettempdir()) / "city_pollution" / "plots"
     plots_url_base: str = "/api/plots"
+    plot_render_workers: int = 2
+    plot_render_timeout: float = 30.0
+    plot_render_queue_size: int = 16
+    plot_max_points: int = 500
+    plots_max_bytes: int = 512 * 1024 * 1024
+    plots_max_age: int = 7 * 24 * 60 * 60
+    plots_eviction_interval: float = 60.0
+    pollution_export_batch_size: int = 1000
+    # yearly pollution partitions created ahead of the current year
+    pollution_partitions_ahead: int = 1
+    # full years of pollution kept before the current one, 0 keeps everything
+    pollution_retention_years: int = 0
+    response_cache_size: int = 256
+    geocoder_cache_size: int = 1024
+    geocoder_cache_ttl: int = 30 * 24 * 60 * 60
+    geocoder_cache_negative_ttl: int = 60 * 60
+    geocoder_cache_precision: int = 3
+    geocoder_cache_persistent: bool = True
+    openweather_timeout: float = 30.0
+    openweather_connect_timeout: float = 5.0
+    openweather_max_connections: int = 20
+    openweather_max_keepalive_connections: int = 10
+    openweather_keepalive_expiry: float = 30.0
+    openweather_http2: bool = True
+    openweather_window_days: int = Field(default=30, gt=0)
+    openweather_max_concurrency: int = 4
+    openweather_max_retries: int = 3
+    openweather_retry_backoff: float = 0.5
 
     class Config:
         env_file = ".env"
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from city_pollution.config.settings import settings
@@ -6,6 +8,7 @@ from city_pollution.config.settings import settings
 DATABASE_URL = settings.database_url
 
 _session_maker = None
+_async_session_maker = None
 
 
 def session_maker() -> sessionmaker:
@@ -14,3 +17,27 @@ def session_maker() -> sessionmaker:
         engine = create_engine(DATABASE_URL)
         _session_maker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     return _session_maker
+
+
+def async_database_url() -> str:
+    """
+    Async database URL, derived from the sync one by switching to asyncpg
+    unless it is configured explicitly
+    """
+    if settings.async_database_url:
+        return settings.async_database_url
+    url = make_url(DATABASE_URL)
+    return url.set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+def async_session_maker() -> async_sessionmaker[AsyncSession]:
+    global _async_session_maker
+    if _async_session_maker is None:
+        engine = create_async_engine(async_database_url())
+        # objects are used after commit, there is no lazy loading in async
+        _async_session_maker = async_sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_maker
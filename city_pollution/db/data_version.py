@@ -0,0 +1,45 @@
+from typing import Any, Iterable
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
+
+from city_pollution.db.models.data_version import data_version_table
+
+# Version row bumped when the data of every city changes. The data version of
+# a city is the sum of its own row and this one, so it grows on either bump.
+ALL_CITIES = 0
+
+
+def bump_data_version_statement(dialect_name: str, city_ids: Iterable[int]) -> Insert:
+    """
+    Build INSERT ... ON CONFLICT (city_id) DO UPDATE incrementing the data
+    versions of the cities. Repositories execute it in the transaction of
+    the write, so every process sees the new version together with the data
+    and caches keyed by the version can be shared between processes and
+    outlive restarts.
+    """
+    if dialect_name == "postgresql":
+        insert = postgresql.insert
+    elif dialect_name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported for {dialect_name}")
+
+    # sorted, so concurrent bumps lock the rows in the same order
+    statement = insert(data_version_table).values(
+        [{"city_id": city_id, "version": 1} for city_id in sorted(city_ids)]
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[data_version_table.c.city_id],
+        set_={"version": data_version_table.c.version + 1},
+    )
+
+
+def data_version_statement(city_id: int) -> Select[Any]:
+    """
+    Build a query for the data version of a city, 0 until its data is written
+    """
+    return select(func.coalesce(func.sum(data_version_table.c.version), 0)).where(
+        data_version_table.c.city_id.in_([city_id, ALL_CITIES])
+    )
@@ -1,6 +1,14 @@
 from datetime import datetime
 
-from sqlalchemy import Table, Column, Integer, String, Float, UniqueConstraint
+from sqlalchemy import (
+    Table,
+    Column,
+    Index,
+    Integer,
+    String,
+    Float,
+    UniqueConstraint,
+)
 
 from .base import mapper_registry
 
@@ -17,4 +25,6 @@ city_table = Table(
     Column("time_created", Integer, default=datetime.now().timestamp()),
     Column("time_updated", Integer),
     UniqueConstraint("name", "lat", "lon"),
+    # nearest city lookups by coordinates, see city_by_lat_and_lon_statement
+    Index("ix_city_lat_lon", "lat", "lon"),
 )
@@ -0,0 +1,12 @@
+from sqlalchemy import Table, Column, BigInteger, Integer
+
+from .base import mapper_registry
+
+# Per-city data versions, bumped in the transaction of every write to a
+# city's data, see city_pollution.db.data_version
+data_version_table = Table(
+    "data_version",
+    mapper_registry.metadata,
+    Column("city_id", Integer, primary_key=True, autoincrement=False),
+    Column("version", BigInteger, nullable=False),
+)
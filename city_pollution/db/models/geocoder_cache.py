@@ -0,0 +1,11 @@
+from sqlalchemy import Table, Column, Integer, String, JSON
+
+from .base import mapper_registry
+
+geocoder_cache_table = Table(
+    "geocoder_cache",
+    mapper_registry.metadata,
+    Column("key", String(512), primary_key=True),
+    Column("value", JSON),
+    Column("expires_at", Integer, nullable=False, index=True),
+)
@@ -1,3 +1,5 @@
 import city_pollution.db.models.city  # noqa
+import city_pollution.db.models.data_version  # noqa
+import city_pollution.db.models.geocoder_cache  # noqa
 import city_pollution.db.models.pollution  # noqa
 from city_pollution.db.models.base import Base  # noqa
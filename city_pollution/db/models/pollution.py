@@ -1,7 +1,12 @@
-from sqlalchemy import Table, Column, Integer, Float, ForeignKey, Date
+from sqlalchemy import Table, Column, Integer, Float, ForeignKey, Date, Index
 
 from .base import mapper_registry
 
+POLLUTANT_COLUMNS = ("co", "no", "no2", "o3", "so2", "pm2_5", "pm10", "nh3")
+
+# On PostgreSQL the table is range partitioned by date into yearly partitions
+# (see city_pollution.db.partitions) with the primary key (id, date), as the
+# primary key of a partitioned table has to include the partition key
 pollution_table = Table(
     "pollution",
     mapper_registry.metadata,
@@ -14,6 +19,7 @@ pollution_table = Table(
     Column("pm2_5", Float),
     Column("pm10", Float),
     Column("nh3", Float),
-    Column("date", Date),
-    Column("city_id", ForeignKey("city.id", ondelete="CASCADE"), index=True),
+    Column("date", Date, nullable=False),
+    Column("city_id", ForeignKey("city.id", ondelete="CASCADE")),
+    Index("ix_pollution_city_id_date", "city_id", "date", unique=True),
 )
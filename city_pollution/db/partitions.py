@@ -0,0 +1,103 @@
+from datetime import date
+from typing import Iterable, List
+
+from sqlalchemy import Connection, TextClause, text
+
+from city_pollution.db.models.pollution import pollution_table
+
+# On PostgreSQL pollution is range partitioned by date, one partition per year
+PARTITION_PREFIX = f"{pollution_table.name}_y"
+
+
+def partition_name(year: int) -> str:
+    return f"{PARTITION_PREFIX}{year:04d}"
+
+
+def create_partition_statement(year: int) -> TextClause:
+    """
+    Build CREATE TABLE for the partition holding the dates of the year
+    """
+    return text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(year)} "
+        f"PARTITION OF {pollution_table.name} "
+        f"FOR VALUES FROM ('{date(year, 1, 1)}') TO ('{date(year + 1, 1, 1)}')"
+    )
+
+
+def partition_years_statement() -> TextClause:
+    """
+    Build a query for the names of the partitions attached to pollution
+    """
+    return text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table"
+    ).bindparams(table=pollution_table.name)
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """
+    Whether pollution is a partitioned table, only on PostgreSQL after the
+    partitioning migration
+    """
+    if connection.dialect.name != "postgresql":
+        return False
+    statement = text(
+        "SELECT 1 FROM pg_partitioned_table "
+        "JOIN pg_class ON pg_partitioned_table.partrelid = pg_class.oid "
+        "WHERE pg_class.relname = :table"
+    ).bindparams(table=pollution_table.name)
+    return connection.execute(statement).first() is not None
+
+
+def partition_years(connection: Connection) -> List[int]:
+    """
+    Years of the partitions attached to pollution
+    """
+    names = connection.scalars(partition_years_statement()).all()
+    return sorted(
+        int(name[len(PARTITION_PREFIX) :])
+        for name in names
+        if name.startswith(PARTITION_PREFIX) and name[len(PARTITION_PREFIX) :].isdigit()
+    )
+
+
+def ensure_partitions(connection: Connection, years: Iterable[int]) -> List[int]:
+    """
+    Create the yearly partitions of pollution that don't exist yet, so rows
+    of any year can be inserted. Does nothing if pollution isn't partitioned.
+
+    :param connection: Connection of the current transaction
+    :param years: Years that need a partition
+    :return: Years of the created partitions
+    :rtype: List[int]
+    """
+    years = set(years)
+    if not years or not is_partitioned(connection):
+        return []
+    missing = sorted(years - set(partition_years(connection)))
+    for year in missing:
+        connection.execute(create_partition_statement(year))
+    return missing
+
+
+def drop_partitions_before(connection: Connection, year: int) -> List[int]:
+    """
+    Detach and drop the partitions of the years before the given one. Whole
+    partitions are dropped instead of deleting rows, so retention neither
+    scans the data nor leaves dead tuples behind.
+
+    :param connection: Connection of the current transaction
+    :param year: First year to keep
+    :return: Years of the dropped partitions
+    :rtype: List[int]
+    """
+    dropped = [x for x in partition_years(connection) if x < year]
+    for old_year in dropped:
+        name = partition_name(old_year)
+        connection.execute(
+            text(f"ALTER TABLE {pollution_table.name} DETACH PARTITION {name}")
+        )
+        connection.execute(text(f"DROP TABLE {name}"))
+    return dropped
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+from city_pollution.db.repositories.city_repository import (
+    cities_statement,
+    city_by_lat_and_lon_statement,
+    insert_city_statement,
+    search_city_statement,
+    update_city_statement,
+)
+from city_pollution.db.data_version import bump_data_version_statement
+from city_pollution.db.repositories.interfaces.async_city_repository import (
+    IAsyncCityRepository,
+)
+from city_pollution.dependencies import AsyncSession
+from city_pollution.entities.city import City
+
+
+@dataclass
+class AsyncCityRepository(IAsyncCityRepository):
+    db: AsyncSession
+
+    async def create_city(self, city: City) -> City:
+        dialect_name = self.db.get_bind().dialect.name
+        await self.db.execute(insert_city_statement(dialect_name, city))
+        await self.db.commit()
+        result = await self.db.scalars(
+            search_city_statement(city.name, city.lat, city.lon)
+        )
+        return result.one()
+
+    async def search_city(self, city_name: str, lat: float, lon: float) -> City | None:
+        result = await self.db.scalars(search_city_statement(city_name, lat, lon))
+        return result.one_or_none()
+
+    async def get_city_by_id(self, city_id: int) -> Optional[City]:
+        return await self.db.get(City, city_id)
+
+    async def get_city_by_lat_and_lon(
+        self, lat: float, lon: float, tolerance: float = 0.01
+    ) -> City | None:
+        result = await self.db.scalars(
+            city_by_lat_and_lon_statement(lat, lon, tolerance)
+        )
+        return result.first()
+
+    async def update_city(self, city_id: int, city_data: Dict[Any, Any]) -> None:
+        await self.db.execute(update_city_statement(city_id, city_data))
+        await self._bump_data_version(city_id)
+        await self.db.flush()
+
+    async def delete_city(self, city_id: int) -> bool:
+        city = await self.get_city_by_id(city_id)
+        if city is not None:
+            await self.db.delete(city)
+            # its pollution is deleted with it (ON DELETE CASCADE)
+            await self._bump_data_version(city_id)
+            await self.db.commit()
+            return True
+        return False
+
+    async def get_cities(
+        self,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[City]:
+        result = await self.db.scalars(cities_statement(limit, offset, after_id))
+        return list(result.all())
+
+    async def _bump_data_version(self, city_id: int) -> None:
+        dialect_name = self.db.get_bind().dialect.name
+        await self.db.execute(bump_data_version_statement(dialect_name, [city_id]))
@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import AsyncIterator, List, Optional, Any, Dict, Tuple
+
+from city_pollution.db.repositories.interfaces.async_pollution_repository import (
+    IAsyncPollutionRepository,
+)
+from city_pollution.db.data_version import (
+    ALL_CITIES,
+    bump_data_version_statement,
+    data_version_statement,
+)
+from city_pollution.db.partitions import ensure_partitions
+from city_pollution.db.repositories.pollution_repository import (
+    PollutionRow,
+    aggregated_pollution_statement,
+    aggregated_row_to_pollution,
+    date_span_statement,
+    delete_pollution_before_year,
+    delete_pollution_range_statement,
+    has_date_gaps,
+    pollution_by_id_statement,
+    pollution_city_ids,
+    pollution_dates_statement,
+    pollution_range_statement,
+    pollution_rows_statement,
+    pollution_to_row,
+    pollution_years,
+    upsert_pollution_statement,
+)
+from city_pollution.dependencies import AsyncSession
+from city_pollution.entities.pollution import Pollution
+
+
+@dataclass
+class AsyncPollutionRepository(IAsyncPollutionRepository):
+    db: AsyncSession
+
+    async def create_pollution(self, pollution_data: List[Pollution]) -> None:
+        await self.create_pollution_rows([pollution_to_row(x) for x in pollution_data])
+
+    async def create_pollution_rows(self, pollution_rows: List[Dict[str, Any]]) -> None:
+        if not pollution_rows:
+            return
+        years = pollution_years(pollution_rows)
+        await self.db.run_sync(
+            lambda session: ensure_partitions(session.connection(), years)
+        )
+        dialect_name = self.db.get_bind().dialect.name
+        await self.db.execute(upsert_pollution_statement(dialect_name), pollution_rows)
+        await self.db.execute(
+            bump_data_version_statement(
+                dialect_name, pollution_city_ids(pollution_rows)
+            )
+        )
+        await self.db.commit()
+
+    async def get_pollution_by_id(
+        self, pollution_id: int, pollution_date: Optional[date] = None
+    ) -> Any:
+        statement = pollution_by_id_statement(pollution_id, pollution_date)
+        result = await self.db.scalars(statement)
+        return result.first()
+
+    async def get_pollution(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Pollution]:
+        statement = pollution_range_statement(start, end, city_id, limit, offset, after)
+        result = await self.db.scalars(statement)
+        return list(result.all())
+
+    async def get_pollution_rows(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[PollutionRow]:
+        statement = pollution_rows_statement(start, end, city_id, limit, offset, after)
+        result = await self.db.execute(statement)
+        return list(result.all())
+
+    async def stream_pollution_rows(
+        self, start: date, end: date, city_id: int, batch_size: int
+    ) -> AsyncIterator[List[PollutionRow]]:
+        statement = pollution_rows_statement(start, end, city_id).execution_options(
+            yield_per=batch_size
+        )
+        result = await self.db.stream(statement)
+        async for partition in result.partitions():
+            yield list(partition)
+
+    def supports_sql_aggregation(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    async def get_aggregated_pollution(
+        self, start: date, end: date, city_id: int, period: str
+    ) -> Tuple[List[Pollution], bool]:
+        result = await self.db.execute(
+            aggregated_pollution_statement(start, end, city_id, period)
+        )
+        pollutions = [aggregated_row_to_pollution(row, city_id) for row in result]
+        span = await self.db.execute(date_span_statement(start, end, city_id))
+        first, last, days = span.one()
+        return pollutions, has_date_gaps(first, last, days)
+
+    async def get_pollution_dates(
+        self, start: date, end: date, city_id: int
+    ) -> List[date]:
+        result = await self.db.scalars(pollution_dates_statement(start, end, city_id))
+        return list(result.all())
+
+    async def update_pollution(
+        self,
+        pollution_id: int,
+        pollution_data: Dict[str, Any],
+        pollution_date: Optional[date] = None,
+    ) -> Pollution | None:
+        pollution = await self.get_pollution_by_id(pollution_id, pollution_date)
+        if pollution:
+            for key, value in pollution_data.items():
+                setattr(pollution, key, value)
+            await self._bump_data_versions([pollution.city_id])
+            await self.db.commit()
+            await self.db.refresh(pollution)
+            return pollution
+        return None
+
+    async def delete_pollution_range(self, start: date, end: date, city_id: int) -> int:
+        result = await self.db.execute(
+            delete_pollution_range_statement(start, end, city_id)
+        )
+        await self._bump_data_versions([city_id])
+        await self.db.commit()
+        return result.rowcount
+
+    async def ensure_partitions(self, years: List[int]) -> None:
+        await self.db.run_sync(
+            lambda session: ensure_partitions(session.connection(), years)
+        )
+        await self.db.commit()
+
+    async def delete_pollution_before_year(self, year: int) -> int:
+        result = await self.db.run_sync(
+            lambda session: delete_pollution_before_year(session.connection(), year)
+        )
+        if result:
+            await self._bump_data_versions([ALL_CITIES])
+        await self.db.commit()
+        return result
+
+    async def get_data_version(self, city_id: int) -> int:
+        return int(await self.db.scalar(data_version_statement(city_id)) or 0)
+
+    async def _bump_data_versions(self, city_ids: List[int]) -> None:
+        dialect_name = self.db.get_bind().dialect.name
+        await self.db.execute(bump_data_version_statement(dialect_name, city_ids))
@@ -1,69 +1,147 @@
+import math
 from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 
-from sqlalchemy import and_
+from sqlalchemy import and_, Select, Update, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
 
+from city_pollution.db.data_version import bump_data_version_statement
+from city_pollution.db.models.city import city_table
 from city_pollution.db.repositories.interfaces.city_repository import ICityRepository
 from city_pollution.dependencies import Session
 from city_pollution.entities.city import City
 
 
+def insert_city_statement(dialect_name: str, city: City) -> Insert:
+    """
+    Build INSERT ... ON CONFLICT (name, lat, lon) DO NOTHING for the given
+    dialect, a city inserted meanwhile by a concurrent import is kept
+    """
+    if dialect_name == "postgresql":
+        insert = postgresql.insert
+    elif dialect_name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported for {dialect_name}")
+
+    values = {
+        column.name: getattr(city, column.name)
+        for column in city_table.columns
+        if column.name != "id" and getattr(city, column.name, None) is not None
+    }
+    return (
+        insert(city_table)
+        .values(values)
+        .on_conflict_do_nothing(
+            index_elements=[city_table.c.name, city_table.c.lat, city_table.c.lon]
+        )
+    )
+
+
+def search_city_statement(city_name: str, lat: float, lon: float) -> Select[Any]:
+    return select(City).filter_by(name=city_name, lat=lat, lon=lon)
+
+
+def city_by_lat_and_lon_statement(
+    lat: float, lon: float, tolerance: float
+) -> Select[Any]:
+    """
+    Build a query for the city nearest to the coordinates within tolerance
+    degrees. The latitude range is an index range scan on the (lat, lon)
+    index, the longitude range filters on the index entries, so only cities
+    in the bounding box are read whatever the size of the table. The
+    candidates are ordered by squared distance on an equirectangular
+    projection, longitude scaled by the cosine of the latitude.
+    """
+    lon_scale = math.cos(math.radians(lat))
+    distance = (City.lat - lat) * (City.lat - lat) + (City.lon - lon) * (
+        City.lon - lon
+    ) * (lon_scale * lon_scale)
+    return (
+        select(City)
+        .where(
+            and_(
+                City.lat.between(lat - tolerance, lat + tolerance),
+                City.lon.between(lon - tolerance, lon + tolerance),
+            )
+        )
+        .order_by(distance, City.id)
+        .limit(1)
+    )
+
+
+def update_city_statement(city_id: int, city_data: Dict[Any, Any]) -> Update:
+    return update(City).where(City.id == city_id).values(**city_data)
+
+
+def cities_statement(
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> Select[Any]:
+    """
+    Build a query for cities ordered by id, with after_id only the cities
+    following that id (keyset pagination)
+    """
+    statement = select(City).order_by(City.id)
+    if after_id is not None:
+        statement = statement.where(City.id > after_id)
+    if offset is not None:
+        statement = statement.offset(offset)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
 @dataclass
 class CityRepository(ICityRepository):
     db: Session
 
     def create_city(self, city: City) -> City:
-        db_city = self.search_city(city_name=city.name, lat=city.lat, lon=city.lon)
-        if db_city:
-            return city
-
-        self.db.add(city)
+        dialect_name = self.db.get_bind().dialect.name
+        self.db.execute(insert_city_statement(dialect_name, city))
         self.db.commit()
-        self.db.refresh(city)
-        return city
+        return self.db.scalars(
+            search_city_statement(city.name, city.lat, city.lon)
+        ).one()
 
     def search_city(self, city_name: str, lat: float, lon: float) -> City | None:
-        return (
-            self.db.query(City)
-            .filter_by(name=city_name, lat=lat, lon=lon)
-            .one_or_none()
-        )
+        return self.db.scalars(search_city_statement(city_name, lat, lon)).one_or_none()
 
     def get_city_by_id(self, city_id: int) -> Optional[City]:
-        return self.db.query(City).get(city_id)
+        return self.db.get(City, city_id)
 
     def get_city_by_lat_and_lon(
         self, lat: float, lon: float, tolerance: float = 0.01
     ) -> City | None:
-        return (
-            self.db.query(City)
-            .filter(
-                and_(
-                    City.lat.between(lat - tolerance, lat + tolerance),
-                    City.lon.between(lon - tolerance, lon + tolerance),
-                )
-            )
-            .first()
-        )
+        return self.db.scalars(
+            city_by_lat_and_lon_statement(lat, lon, tolerance)
+        ).first()
 
     def update_city(self, city_id: int, city_data: Dict[Any, Any]) -> None:
-        self.db.query(City).filter_by(id=city_id).update(**city_data)
+        self.db.execute(update_city_statement(city_id, city_data))
+        self._bump_data_version(city_id)
         self.db.flush()
 
     def delete_city(self, city_id: int) -> bool:
         city = self.get_city_by_id(city_id)
         if city is not None:
             self.db.delete(city)
+            # its pollution is deleted with it (ON DELETE CASCADE)
+            self._bump_data_version(city_id)
             self.db.commit()
             return True
         return False
 
     def get_cities(
-        self, limit: Optional[int] = None, offset: Optional[int] = None
+        self,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after_id: Optional[int] = None,
     ) -> List[City]:
-        query = self.db.query(City)
-        if offset is not None:
-            query = query.offset(offset)
-        if limit is not None:
-            query = query.limit(limit)
-        return query.all()
+        return list(self.db.scalars(cities_statement(limit, offset, after_id)).all())
+
+    def _bump_data_version(self, city_id: int) -> None:
+        dialect_name = self.db.get_bind().dialect.name
+        self.db.execute(bump_data_version_statement(dialect_name, [city_id]))
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from city_pollution.db.models.geocoder_cache import geocoder_cache_table
+from city_pollution.db.repositories.interfaces.geocoder_cache_repository import (
+    IGeocoderCacheRepository,
+)
+from city_pollution.dependencies import Session
+
+
+@dataclass
+class GeocoderCacheRepository(IGeocoderCacheRepository):
+    db: Session
+
+    def get_entry(self, key: str, now: int) -> Optional[Tuple[Any, int]]:
+        row = self.db.execute(
+            select(geocoder_cache_table.c.value, geocoder_cache_table.c.expires_at)
+            .where(geocoder_cache_table.c.key == key)
+            .where(geocoder_cache_table.c.expires_at > now)
+        ).one_or_none()
+        if row is None:
+            return None
+        return row.value, row.expires_at
+
+    def set_entry(self, key: str, value: Any, expires_at: int) -> None:
+        dialect_name = self.db.get_bind().dialect.name
+        insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+        statement = insert(geocoder_cache_table).values(
+            key=key, value=value, expires_at=expires_at
+        )
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[geocoder_cache_table.c.key],
+                set_={
+                    "value": statement.excluded.value,
+                    "expires_at": statement.excluded.expires_at,
+                },
+            )
+        )
+        self.db.commit()
+
+    def delete_expired(self, now: int) -> int:
+        result = self.db.execute(
+            delete(geocoder_cache_table).where(geocoder_cache_table.c.expires_at <= now)
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, List
+
+from city_pollution.entities.city import City
+
+
+class IAsyncCityRepository(ABC):
+    @abstractmethod
+    async def create_city(self, city: City) -> City:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_city(self, city_name: str, lat: float, lon: float) -> City | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_city_by_id(self, city_id: int) -> Optional[City]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_city_by_lat_and_lon(self, lat: float, lon: float) -> City | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_city(self, city_id: int, city_data: Dict[Any, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_city(self, city_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_cities(
+        self,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[City]:
+        raise NotImplementedError
@@ -31,6 +31,9 @@ class ICityRepository(ABC):
 
     @abstractmethod
     def get_cities(
-        self, limit: Optional[int] = None, offset: Optional[int] = None
+        self,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after_id: Optional[int] = None,
     ) -> List[City]:
         raise NotImplementedError
@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Tuple
+
+
+class IGeocoderCacheRepository(ABC):
+    @abstractmethod
+    def get_entry(self, key: str, now: int) -> Optional[Tuple[Any, int]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_entry(self, key: str, value: Any, expires_at: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_expired(self, now: int) -> int:
+        raise NotImplementedError
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from datetime import date
-from typing import List, Optional, Any, Dict
+from typing import Iterator, List, Optional, Any, Dict, Tuple
 
 from city_pollution.entities.pollution import Pollution
 
@@ -11,7 +11,13 @@ class IPollutionRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_pollution_by_id(self, pollution_id: int) -> Any:
+    def create_pollution_rows(self, pollution_rows: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pollution_by_id(
+        self, pollution_id: int, pollution_date: Optional[date] = None
+    ) -> Any:
         raise NotImplementedError
 
     @abstractmethod
@@ -22,15 +28,63 @@ class IPollutionRepository(ABC):
         city_id: int,
         limit: Optional[int],
         offset: Optional[int],
+        after: Optional[Tuple[date, int]] = None,
     ) -> List[Pollution]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_pollution_rows(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_pollution_rows(
+        self, start: date, end: date, city_id: int, batch_size: int
+    ) -> Iterator[List[Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def supports_sql_aggregation(self) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_aggregated_pollution(
+        self, start: date, end: date, city_id: int, period: str
+    ) -> Tuple[List[Pollution], bool]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pollution_dates(self, start: date, end: date, city_id: int) -> List[date]:
+        raise NotImplementedError
+
     @abstractmethod
     def update_pollution(
-        self, pollution_id: int, pollution_data: Dict[str, Any]
+        self,
+        pollution_id: int,
+        pollution_data: Dict[str, Any],
+        pollution_date: Optional[date] = None,
     ) -> Optional[Pollution]:
         raise NotImplementedError
 
     @abstractmethod
     def delete_pollution_range(self, start: date, end: date, city_id: int) -> int:
         raise NotImplementedError
+
+    @abstractmethod
+    def ensure_partitions(self, years: List[int]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_pollution_before_year(self, year: int) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_data_version(self, city_id: int) -> int:
+        raise NotImplementedError
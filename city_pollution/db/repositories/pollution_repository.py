@@ -1,26 +1,275 @@
 from dataclasses import dataclass
-from datetime import date, datetime, time
-from typing import List, Optional, Any, Dict
+from datetime import date
+from typing import Iterator, List, Optional, Any, Dict, Set, Tuple
 
-from sqlalchemy import and_
+from sqlalchemy import (
+    and_,
+    Connection,
+    Date,
+    Delete,
+    Row,
+    Select,
+    cast,
+    delete,
+    func,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
 
+from city_pollution.db.data_version import (
+    ALL_CITIES,
+    bump_data_version_statement,
+    data_version_statement,
+)
+from city_pollution.db.models.pollution import POLLUTANT_COLUMNS, pollution_table
+from city_pollution.db.partitions import (
+    drop_partitions_before,
+    ensure_partitions,
+    is_partitioned,
+)
 from city_pollution.db.repositories.interfaces.pollution_repository import (
     IPollutionRepository,
 )
 from city_pollution.dependencies import Session
 from city_pollution.entities.pollution import Pollution
 
+# A pollution row read without creating an ORM instance, it has the same
+# attributes as Pollution
+PollutionRow = Row[Any]
+
+
+def upsert_pollution_statement(dialect_name: str) -> Insert:
+    """
+    Build INSERT ... ON CONFLICT (city_id, date) DO UPDATE for the given dialect
+    """
+    if dialect_name == "postgresql":
+        insert = postgresql.insert
+    elif dialect_name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported for {dialect_name}")
+
+    statement = insert(pollution_table)
+    return statement.on_conflict_do_update(
+        index_elements=[pollution_table.c.city_id, pollution_table.c.date],
+        set_={column: statement.excluded[column] for column in POLLUTANT_COLUMNS},
+    )
+
+
+def pollution_to_row(pollution: Pollution) -> Dict[str, Any]:
+    row = {column: getattr(pollution, column) for column in POLLUTANT_COLUMNS}
+    row["date"] = pollution.date
+    row["city_id"] = pollution.city_id
+    return row
+
+
+def pollution_city_ids(pollution_rows: List[Dict[str, Any]]) -> Set[int]:
+    return {row["city_id"] for row in pollution_rows}
+
+
+def pollution_years(pollution_rows: List[Dict[str, Any]]) -> Set[int]:
+    return {row["date"].year for row in pollution_rows if row["date"] is not None}
+
+
+def pollution_by_id_statement(
+    pollution_id: int, pollution_date: Optional[date] = None
+) -> Select[Any]:
+    """
+    Build a query for a pollution row by id. With the date, only the
+    partition of that year is searched on PostgreSQL.
+    """
+    statement = select(Pollution).where(Pollution.id == pollution_id)
+    if pollution_date is not None:
+        statement = statement.where(Pollution.date == pollution_date)
+    return statement
+
+
+def pollution_range_statement(
+    start: date,
+    end: date,
+    city_id: int,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None,
+) -> Select[Any]:
+    """
+    Build a query for the pollution of a city in the date range, ordered by
+    (date, id). With after, only rows following that (date, id) key are
+    selected, so deep pages seek on the (city_id, date) index instead of
+    skipping offset rows.
+    """
+    statement = (
+        select(Pollution)
+        .where(
+            Pollution.city_id == city_id,
+            and_(
+                Pollution.date >= start,
+                Pollution.date <= end,
+            ),
+        )
+        .order_by(Pollution.date, Pollution.id)
+    )
+    if after is not None:
+        after_date, after_id = after
+        statement = statement.where(
+            Pollution.date >= after_date,
+            tuple_(Pollution.date, Pollution.id) > tuple_(after_date, after_id),
+        )
+    if offset:
+        statement = statement.offset(offset)
+    if limit:
+        statement = statement.limit(limit)
+    return statement
+
+
+def pollution_rows_statement(
+    start: date,
+    end: date,
+    city_id: int,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None,
+) -> Select[Any]:
+    """
+    Build the query of pollution_range_statement selecting the table columns
+    instead of the entity, so results are plain rows and skip ORM
+    instrumentation and the identity map
+    """
+    statement = pollution_range_statement(start, end, city_id, limit, offset, after)
+    return statement.with_only_columns(*pollution_table.c)
+
+
+def pollution_dates_statement(start: date, end: date, city_id: int) -> Select[Any]:
+    """
+    Build a query for the distinct dates stored for a city in the date range
+    """
+    return (
+        select(Pollution.date)
+        .where(
+            Pollution.city_id == city_id,
+            Pollution.date >= start,
+            Pollution.date <= end,
+        )
+        .distinct()
+        .order_by(Pollution.date)
+    )
+
+
+def delete_pollution_range_statement(start: date, end: date, city_id: int) -> Delete:
+    """
+    Build a statement deleting the pollution of a city in the date range
+    """
+    return delete(Pollution).where(
+        Pollution.date >= start,
+        Pollution.date <= end,
+        Pollution.city_id == city_id,
+    )
+
+
+def delete_pollution_before_statement(year: int) -> Delete:
+    """
+    Build a statement deleting the pollution of all cities before the year
+    """
+    return delete(Pollution).where(Pollution.date < date(year, 1, 1))
+
+
+def delete_pollution_before_year(connection: Connection, year: int) -> int:
+    """
+    Remove the pollution of all cities before the year. Partitions of the
+    old years are dropped when pollution is partitioned, otherwise the rows
+    are deleted.
+
+    :return: Number of dropped partitions or deleted rows
+    :rtype: int
+    """
+    if is_partitioned(connection):
+        return len(drop_partitions_before(connection, year))
+    return connection.execute(delete_pollution_before_statement(year)).rowcount
+
+
+def aggregated_pollution_statement(
+    start: date, end: date, city_id: int, period: str
+) -> Select[Any]:
+    """
+    Build a query averaging every pollutant per month or year using date_trunc
+    :param period: Postgres date_trunc field, "month" or "year"
+    """
+    period_start = cast(func.date_trunc(period, pollution_table.c.date), Date)
+    return (
+        select(
+            period_start.label("date"),
+            *[
+                func.avg(pollution_table.c[column]).label(column)
+                for column in POLLUTANT_COLUMNS
+            ],
+        )
+        .where(
+            pollution_table.c.city_id == city_id,
+            pollution_table.c.date >= start,
+            pollution_table.c.date <= end,
+        )
+        .group_by(period_start)
+        .order_by(period_start)
+    )
+
+
+def date_span_statement(start: date, end: date, city_id: int) -> Select[Any]:
+    """
+    Build a query returning the first and last stored date and the number of stored days
+    """
+    return select(
+        func.min(pollution_table.c.date),
+        func.max(pollution_table.c.date),
+        func.count(pollution_table.c.date.distinct()),
+    ).where(
+        pollution_table.c.city_id == city_id,
+        pollution_table.c.date >= start,
+        pollution_table.c.date <= end,
+    )
+
+
+def has_date_gaps(first: Optional[date], last: Optional[date], days: int) -> bool:
+    if first is None or last is None:
+        return False
+    return (last - first).days + 1 > days
+
+
+def aggregated_row_to_pollution(row: Any, city_id: int) -> Pollution:
+    return Pollution(
+        **{column: getattr(row, column) for column in POLLUTANT_COLUMNS},
+        date=row.date,
+        city_id=city_id,
+    )
+
 
 @dataclass
 class PollutionRepository(IPollutionRepository):
     db: Session
 
     def create_pollution(self, pollution_data: List[Pollution]) -> None:
-        self.db.bulk_save_objects(pollution_data)
+        self.create_pollution_rows([pollution_to_row(x) for x in pollution_data])
+
+    def create_pollution_rows(self, pollution_rows: List[Dict[str, Any]]) -> None:
+        if not pollution_rows:
+            return
+        # a year seen for the first time gets its partition before the insert
+        ensure_partitions(self.db.connection(), pollution_years(pollution_rows))
+        dialect_name = self.db.get_bind().dialect.name
+        self.db.execute(upsert_pollution_statement(dialect_name), pollution_rows)
+        self.db.execute(
+            bump_data_version_statement(
+                dialect_name, pollution_city_ids(pollution_rows)
+            )
+        )
         self.db.commit()
 
-    def get_pollution_by_id(self, pollution_id: int) -> Any:
-        return self.db.query(Pollution).get(pollution_id)
+    def get_pollution_by_id(
+        self, pollution_id: int, pollution_date: Optional[date] = None
+    ) -> Any:
+        statement = pollution_by_id_statement(pollution_id, pollution_date)
+        return self.db.scalars(statement).first()
 
     def get_pollution(
         self,
@@ -29,42 +278,88 @@ class PollutionRepository(IPollutionRepository):
         city_id: int,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
     ) -> List[Pollution]:
-        query = self.db.query(Pollution).filter(
-            Pollution.city_id == city_id,
-            and_(
-                Pollution.date >= start,
-                Pollution.date <= end,
-            ),
+        statement = pollution_range_statement(start, end, city_id, limit, offset, after)
+        return list(self.db.scalars(statement).all())
+
+    def get_pollution_rows(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[PollutionRow]:
+        statement = pollution_rows_statement(start, end, city_id, limit, offset, after)
+        return list(self.db.execute(statement).all())
+
+    def stream_pollution_rows(
+        self, start: date, end: date, city_id: int, batch_size: int
+    ) -> Iterator[List[PollutionRow]]:
+        # yield_per streams from a server side cursor in batches
+        statement = pollution_rows_statement(start, end, city_id).execution_options(
+            yield_per=batch_size
         )
-        query = query.order_by(Pollution.date)
-        if offset:
-            query = query.offset(offset)
-        if limit:
-            query = query.limit(limit)
+        for partition in self.db.execute(statement).partitions():
+            yield list(partition)
+
+    def supports_sql_aggregation(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def get_aggregated_pollution(
+        self, start: date, end: date, city_id: int, period: str
+    ) -> Tuple[List[Pollution], bool]:
+        rows = self.db.execute(
+            aggregated_pollution_statement(start, end, city_id, period)
+        ).all()
+        pollutions = [aggregated_row_to_pollution(row, city_id) for row in rows]
+        first, last, days = self.db.execute(
+            date_span_statement(start, end, city_id)
+        ).one()
+        return pollutions, has_date_gaps(first, last, days)
 
-        return query.all()
+    def get_pollution_dates(self, start: date, end: date, city_id: int) -> List[date]:
+        statement = pollution_dates_statement(start, end, city_id)
+        return list(self.db.scalars(statement).all())
 
     def update_pollution(
-        self, pollution_id: int, pollution_data: Dict[str, Any]
+        self,
+        pollution_id: int,
+        pollution_data: Dict[str, Any],
+        pollution_date: Optional[date] = None,
     ) -> Pollution | None:
-        pollution = self.get_pollution_by_id(pollution_id)
+        pollution = self.get_pollution_by_id(pollution_id, pollution_date)
         if pollution:
             for key, value in pollution_data.items():
                 setattr(pollution, key, value)
+            self._bump_data_versions([pollution.city_id])
             self.db.commit()
             self.db.refresh(pollution)
             return pollution
         return None
 
     def delete_pollution_range(self, start: date, end: date, city_id: int) -> int:
-        result = (
-            self.db.query(Pollution).filter(
-                Pollution.date >= start,
-                Pollution.date <= end,
-                Pollution.city_id == city_id,
-            )
-        ).delete()
+        result = self.db.execute(delete_pollution_range_statement(start, end, city_id))
+        self._bump_data_versions([city_id])
+        self.db.commit()
+        return result.rowcount
 
+    def ensure_partitions(self, years: List[int]) -> None:
+        ensure_partitions(self.db.connection(), years)
+        self.db.commit()
+
+    def delete_pollution_before_year(self, year: int) -> int:
+        result = delete_pollution_before_year(self.db.connection(), year)
+        if result:
+            self._bump_data_versions([ALL_CITIES])
         self.db.commit()
         return result
+
+    def get_data_version(self, city_id: int) -> int:
+        return int(self.db.scalar(data_version_statement(city_id)) or 0)
+
+    def _bump_data_versions(self, city_ids: List[int]) -> None:
+        dialect_name = self.db.get_bind().dialect.name
+        self.db.execute(bump_data_version_statement(dialect_name, city_ids))
@@ -0,0 +1,139 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from city_pollution.db.repositories.interfaces.async_city_repository import (
+    IAsyncCityRepository,
+)
+from city_pollution.db.repositories.interfaces.async_pollution_repository import (
+    IAsyncPollutionRepository,
+)
+from city_pollution.db.repositories.interfaces.city_repository import ICityRepository
+from city_pollution.db.repositories.interfaces.pollution_repository import (
+    IPollutionRepository,
+)
+from city_pollution.entities.city import City
+from city_pollution.entities.pollution import Pollution
+
+
+@dataclass
+class AsyncCityRepositoryAdapter(IAsyncCityRepository):
+    """Sync city repository behind the async interface the services use"""
+
+    repository: ICityRepository
+
+    async def create_city(self, city: City) -> City:
+        return self.repository.create_city(city)
+
+    async def search_city(self, city_name: str, lat: float, lon: float) -> City | None:
+        return self.repository.search_city(city_name, lat, lon)
+
+    async def get_city_by_id(self, city_id: int) -> Optional[City]:
+        return self.repository.get_city_by_id(city_id)
+
+    async def get_city_by_lat_and_lon(self, lat: float, lon: float) -> City | None:
+        return self.repository.get_city_by_lat_and_lon(lat, lon)
+
+    async def update_city(self, city_id: int, city_data: Dict[Any, Any]) -> None:
+        self.repository.update_city(city_id, city_data)
+
+    async def delete_city(self, city_id: int) -> bool:
+        return self.repository.delete_city(city_id)
+
+    async def get_cities(
+        self,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[City]:
+        return self.repository.get_cities(limit, offset, after_id)
+
+
+@dataclass
+class AsyncPollutionRepositoryAdapter(IAsyncPollutionRepository):
+    """Sync pollution repository behind the async interface the services use"""
+
+    repository: IPollutionRepository
+
+    async def create_pollution(self, pollution_data: List[Pollution]) -> None:
+        self.repository.create_pollution(pollution_data)
+
+    async def create_pollution_rows(self, pollution_rows: List[Dict[str, Any]]) -> None:
+        self.repository.create_pollution_rows(pollution_rows)
+
+    async def get_pollution_by_id(
+        self, pollution_id: int, pollution_date: Optional[date] = None
+    ) -> Any:
+        return self.repository.get_pollution_by_id(pollution_id, pollution_date)
+
+    async def get_pollution(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int],
+        offset: Optional[int],
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Pollution]:
+        return self.repository.get_pollution(start, end, city_id, limit, offset, after)
+
+    async def get_pollution_rows(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Any]:
+        return self.repository.get_pollution_rows(
+            start, end, city_id, limit, offset, after
+        )
+
+    async def stream_pollution_rows(
+        self, start: date, end: date, city_id: int, batch_size: int
+    ) -> AsyncIterator[List[Any]]:
+        batches = self.repository.stream_pollution_rows(start, end, city_id, batch_size)
+        # batches are fetched in a worker thread, an export may read many of
+        # them and must not block the event loop meanwhile
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                return
+            yield batch
+
+    def supports_sql_aggregation(self) -> bool:
+        return self.repository.supports_sql_aggregation()
+
+    async def get_aggregated_pollution(
+        self, start: date, end: date, city_id: int, period: str
+    ) -> Tuple[List[Pollution], bool]:
+        return self.repository.get_aggregated_pollution(start, end, city_id, period)
+
+    async def get_pollution_dates(
+        self, start: date, end: date, city_id: int
+    ) -> List[date]:
+        return self.repository.get_pollution_dates(start, end, city_id)
+
+    async def update_pollution(
+        self,
+        pollution_id: int,
+        pollution_data: Dict[str, Any],
+        pollution_date: Optional[date] = None,
+    ) -> Optional[Pollution]:
+        return self.repository.update_pollution(
+            pollution_id, pollution_data, pollution_date
+        )
+
+    async def delete_pollution_range(self, start: date, end: date, city_id: int) -> int:
+        return self.repository.delete_pollution_range(start, end, city_id)
+
+    async def ensure_partitions(self, years: List[int]) -> None:
+        self.repository.ensure_partitions(years)
+
+    async def delete_pollution_before_year(self, year: int) -> int:
+        return self.repository.delete_pollution_before_year(year)
+
+    async def get_data_version(self, city_id: int) -> int:
+        return self.repository.get_data_version(city_id)
@@ -0,0 +1,26 @@
+from typing import Callable, TypeVar, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+DBSession = Union[Session, AsyncSession]
+
+SyncRepository = TypeVar("SyncRepository")
+AsyncRepository = TypeVar("AsyncRepository")
+
+
+def make_repository(
+    db: DBSession,
+    sync_repository: Callable[[Session], SyncRepository],
+    async_repository: Callable[[AsyncSession], AsyncRepository],
+    adapter: Callable[[SyncRepository], AsyncRepository],
+) -> AsyncRepository:
+    """
+    Instantiate the repository matching the session behind its async
+    interface, so services await every call whatever the session: the async
+    repository for AsyncSession, the sync one wrapped in its adapter for
+    everything else
+    """
+    if isinstance(db, AsyncSession):
+        return async_repository(db)
+    return adapter(sync_repository(db))
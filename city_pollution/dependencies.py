@@ -1,17 +1,53 @@
-from typing import Iterator
+import asyncio
+from typing import AsyncIterator, Iterator, Optional, TYPE_CHECKING
 
-from opencage.geocoder import OpenCageGeocode
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from city_pollution.config.settings import settings
-from city_pollution.db.connection import session_maker
-from city_pollution.services.geocoder_service import GeocoderService
+from city_pollution.db.connection import async_session_maker, session_maker
+from city_pollution.db.session import DBSession
+from city_pollution.services.geocoder_cache import CachedGeocoderService, GeocoderCache
+from city_pollution.services.geocoder_service import (
+    GeocoderService,
+    GeocoderServiceInterface,
+)
 from city_pollution.services.openweather_service import OpenWeatherService
+from city_pollution.services.plot_cache import PlotCache
+from city_pollution.services.plot_renderer import PlotRenderer
+from city_pollution.services.plot_store import PlotStoreManager
+from city_pollution.services.response_cache import ResponseCache
 from city_pollution.services.city import CityService
 from city_pollution.services.pollution import PollutionService
 
+if TYPE_CHECKING:
+    from opencage.geocoder import OpenCageGeocode
+
+
+async def get_db() -> AsyncIterator[DBSession]:
+    """
+    Session for request handlers: an AsyncSession when database_async is
+    enabled, so queries don't block the event loop, otherwise a sync Session
+    """
+    if not settings.database_async:
+        with session_maker()() as db:
+            try:
+                yield db
+            except Exception as e:
+                db.rollback()
+                raise e
+        return
+
+    _async_session_maker = async_session_maker()
+    async with _async_session_maker() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            raise e
+
 
-def get_db() -> Iterator[Session]:
+def get_sync_db() -> Iterator[Session]:
     _session_maker = session_maker()
     with _session_maker() as db:
         try:
@@ -23,24 +59,67 @@ def get_db() -> Iterator[Session]:
             db.close()
 
 
-async def get_geocoder() -> OpenCageGeocode:
-    async with OpenCageGeocode(settings.opencage_key) as geocoder:
-        return geocoder
+async def get_geocoder() -> "OpenCageGeocode":
+    """
+    Get the shared geocoder. Its aiohttp session is opened once and
+    kept for the app's lifetime, close_geocoder() closes it on shutdown.
+    """
+    global _geocoder, _geocoder_loop
+    loop = asyncio.get_running_loop()
+    if _geocoder is None or _geocoder_loop is not loop:
+        # imported here, opencage pulls in aiohttp and requests
+        from opencage.geocoder import OpenCageGeocode
+
+        # an aiohttp session is bound to the loop it was created in
+        geocoder = OpenCageGeocode(settings.opencage_key)
+        await geocoder.__aenter__()
+        _geocoder, _geocoder_loop = geocoder, loop
+    return _geocoder
+
+
+async def close_geocoder() -> None:
+    """Close the shared geocoder session"""
+    global _geocoder, _geocoder_loop
+    if _geocoder is not None:
+        await _geocoder.__aexit__(None, None, None)
+        _geocoder, _geocoder_loop = None, None
+
+
+_geocoder: Optional["OpenCageGeocode"] = None
+_geocoder_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
 # Service instances for dependency injection
+_geocoder_cache = None
 _geocoder_service = None
 _openweather_service = None
 _city_service = None
 _pollution_service = None
+_plot_cache = None
+_plot_renderer = None
+_plot_store = None
+_response_cache = None
 
 
-async def get_geocoder_service() -> GeocoderService:
-    """Get or create GeocoderService instance"""
+def get_geocoder_cache() -> GeocoderCache:
+    """Get or create the GeocoderCache instance"""
+    global _geocoder_cache
+    if _geocoder_cache is None:
+        persistent = settings.geocoder_cache_persistent and settings.database_url
+        _geocoder_cache = GeocoderCache(
+            session_factory=session_maker() if persistent else None
+        )
+    return _geocoder_cache
+
+
+async def get_geocoder_service() -> GeocoderServiceInterface:
+    """Get or create GeocoderService instance, wrapped with the geocoder cache"""
     global _geocoder_service
     if _geocoder_service is None:
-        geocoder = await get_geocoder()
-        _geocoder_service = GeocoderService(geocoder)
+        # GeocoderService without a geocoder uses the shared one from get_geocoder()
+        _geocoder_service = CachedGeocoderService(
+            GeocoderService(), get_geocoder_cache()
+        )
     return _geocoder_service
 
 
@@ -61,22 +140,65 @@ async def get_city_service() -> CityService:
     return _city_service
 
 
+def get_plot_cache() -> PlotCache:
+    """Get or create the PlotCache instance"""
+    global _plot_cache
+    if _plot_cache is None:
+        _plot_cache = PlotCache()
+    return _plot_cache
+
+
+def get_plot_store() -> PlotStoreManager:
+    """Get or create the PlotStoreManager instance for the shared PlotCache"""
+    global _plot_store
+    if _plot_store is None:
+        _plot_store = PlotStoreManager(get_plot_cache())
+    return _plot_store
+
+
+def get_plot_renderer() -> PlotRenderer:
+    """Get or create the PlotRenderer instance"""
+    global _plot_renderer
+    if _plot_renderer is None:
+        _plot_renderer = PlotRenderer()
+    return _plot_renderer
+
+
 async def get_pollution_service() -> PollutionService:
     """Get or create PollutionService instance"""
     global _pollution_service
     if _pollution_service is None:
         openweather_service = get_openweather_service()
         city_service = await get_city_service()
-        _pollution_service = PollutionService(openweather_service, city_service)
+        _pollution_service = PollutionService(
+            openweather_service, city_service, get_plot_cache(), get_plot_renderer()
+        )
     return _pollution_service
 
 
+def get_response_cache() -> ResponseCache:
+    """Get or create the ResponseCache instance"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
 __all__ = [
     "get_db",
+    "get_sync_db",
     "get_geocoder",
+    "close_geocoder",
+    "get_geocoder_cache",
     "get_geocoder_service",
     "get_openweather_service",
     "get_city_service",
     "get_pollution_service",
+    "get_plot_cache",
+    "get_plot_renderer",
+    "get_plot_store",
+    "get_response_cache",
     "Session",
+    "AsyncSession",
+    "DBSession",
 ]
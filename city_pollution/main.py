@@ -1,17 +1,62 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict
-import os
+from typing import Dict, AsyncIterator
 
 import uvicorn
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from city_pollution.routers import pollution, city
+from city_pollution.routers import pollution, city, plots
 from city_pollution.config.settings import settings
+from city_pollution.dependencies import (
+    close_geocoder,
+    get_db,
+    get_geocoder,
+    get_geocoder_cache,
+    get_openweather_service,
+    get_plot_renderer,
+    get_plot_store,
+    get_pollution_service,
+)
+
+
+async def maintain_pollution_storage() -> None:
+    """
+    Create upcoming pollution partitions and apply the retention period. The
+    API still starts when the database isn't reachable.
+    """
+    try:
+        pollution_service = await get_pollution_service()
+        async for db in get_db():
+            removed = await pollution_service.maintain_pollution_storage(db)
+            if removed:
+                logging.info(
+                    f"Pollution retention removed {removed} partitions or rows"
+                )
+    except Exception as e:
+        logging.warning(f"Pollution storage maintenance failed: {e}")
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Shared clients live for the whole lifetime of the app
+    openweather_service = get_openweather_service()
+    openweather_service.open()
+    await get_geocoder_cache().purge_expired()
+    await get_geocoder()
+    if settings.database_url:
+        await maintain_pollution_storage()
+    plot_eviction = asyncio.create_task(get_plot_store().run())
+    yield
+    plot_eviction.cancel()
+    await openweather_service.aclose()
+    await close_geocoder()
+    get_plot_renderer().shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -25,11 +70,10 @@ app.add_middleware(
 PLOTS_DIR: Path = settings.temp_dir
 PLOTS_DIR.mkdir(parents=True, exist_ok=True)
 
-# Mount the plots directory
-app.mount(settings.plots_url_base, StaticFiles(directory=PLOTS_DIR), name="plots")
-
 app.include_router(pollution.router)
 app.include_router(city.router)
+# Plots are rendered on their first request and then served from PLOTS_DIR
+app.include_router(plots.router)
 
 
 @app.get("/", operation_id="homepage", summary="Home Page")
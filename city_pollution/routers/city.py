@@ -1,10 +1,23 @@
-from typing import Any, Optional, List
+from typing import Any, Optional, List, Dict
 
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
 
+from city_pollution.db.repositories.async_city_repository import AsyncCityRepository
 from city_pollution.db.repositories.city_repository import CityRepository
-from city_pollution.dependencies import Session, get_db, get_city_service
+from city_pollution.db.repositories.sync_adapters import AsyncCityRepositoryAdapter
+from city_pollution.db.session import make_repository
+from city_pollution.dependencies import (
+    DBSession,
+    get_db,
+    get_city_service,
+    get_geocoder_cache,
+)
 from city_pollution.schemas.city import City
+from city_pollution.schemas.cursor import (
+    InvalidCursor,
+    city_cursor,
+    decode_city_cursor,
+)
 
 router = APIRouter(
     prefix="/api/city",
@@ -16,15 +29,29 @@ router = APIRouter(
     "/",
     operation_id="get_all_cities_from_database",
     summary="Get all cities from the database",
-    description="Gets all cities currently stored in the database. Provides limit and offset parameters for pagination.",
+    description="Gets all cities currently stored in the database, ordered by id. Provides limit "
+    "and offset parameters for pagination. When a page is full the X-Next-Cursor header holds "
+    "a cursor to pass as cursor for the next page, which avoids scanning skipped rows.",
 )
-def get_cities_list(
+async def get_cities_list(
+    response: Response,
     offset: Optional[int] = None,
     limit: Optional[int] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header of the previous page"
+    ),
+    db: DBSession = Depends(get_db),
 ) -> List[City]:
-    city_repo = CityRepository(db)
-    cities = city_repo.get_cities(limit=limit, offset=offset)
+    try:
+        after_id = decode_city_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    city_repo = make_repository(
+        db, CityRepository, AsyncCityRepository, AsyncCityRepositoryAdapter
+    )
+    cities = await city_repo.get_cities(limit=limit, offset=offset, after_id=after_id)
+    if limit and len(cities) == limit:
+        response.headers["X-Next-Cursor"] = city_cursor(cities[-1])
     return [City.model_validate(x) for x in cities]
 
 
@@ -45,15 +72,27 @@ async def find_city_by_name(
     return cities
 
 
+@router.get(
+    "/geocoder-cache/stats/",
+    operation_id="get_geocoder_cache_stats",
+    summary="Get geocoder cache statistics",
+    description="Hit and miss counters of the geocoder result cache",
+)
+async def geocoder_cache_stats() -> Dict[str, int]:
+    return get_geocoder_cache().stats()
+
+
 @router.delete(
     "/{city_id}/",
     operation_id="delete_city_by_id",
     summary="Delete city by id and its data",
     description="Deletes a city by id and all its pollution data",
 )
-async def delete_city(city_id: int, db: Session = Depends(get_db)) -> Any:
-    city_repo = CityRepository(db)
-    result = city_repo.delete_city(city_id)
+async def delete_city(city_id: int, db: DBSession = Depends(get_db)) -> Any:
+    city_repo = make_repository(
+        db, CityRepository, AsyncCityRepository, AsyncCityRepositoryAdapter
+    )
+    result = await city_repo.delete_city(city_id)
     if result:
         return {"message": "City deleted successfully"}
     raise HTTPException(status_code=404, detail="Delete failed, city not found")
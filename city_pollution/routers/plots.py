@@ -0,0 +1,60 @@
+from typing import Dict
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from city_pollution.config.settings import settings
+from city_pollution.dependencies import (
+    get_db,
+    DBSession,
+    get_plot_store,
+    get_pollution_service,
+)
+from city_pollution.services.plot_renderer import PlotRendererBusy
+
+router = APIRouter(
+    prefix=settings.plots_url_base,
+    tags=["plots"],
+)
+
+
+@router.get(
+    "/stats/",
+    operation_id="get_plot_store_stats",
+    summary="Get plot store statistics",
+    description="Size of the plots directory as of the last eviction run, eviction "
+    "counters and plot cache hits and misses",
+)
+async def plot_store_stats() -> Dict[str, int]:
+    return get_plot_store().stats()
+
+
+@router.get(
+    "/{plot_filename}",
+    operation_id="get_pollution_plot",
+    summary="Get pollution plot",
+    description="Get the plot image linked in pollution responses. The plot is rendered "
+    "on the first request and served from the plots directory afterwards. Returns 503 "
+    "when too many plots are being rendered and 504 when rendering times out.",
+    response_class=FileResponse,
+)
+async def get_pollution_plot(
+    plot_filename: str, db: DBSession = Depends(get_db)
+) -> FileResponse:
+    pollution_service = await get_pollution_service()
+    try:
+        path = await pollution_service.render_plot(plot_filename, db)
+    except PlotRendererBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Rendering the plot timed out",
+        )
+    if path is None:
+        raise HTTPException(status_code=404, detail="Plot not found")
+    return FileResponse(path, media_type="image/png")
@@ -1,14 +1,32 @@
 from typing import Dict, Union, Optional
 
-from fastapi import APIRouter, Depends, Query, status, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, Response, status, HTTPException
+from fastapi.responses import StreamingResponse
 
-from city_pollution.dependencies import get_db, Session, get_pollution_service
+from city_pollution.dependencies import (
+    get_db,
+    DBSession,
+    get_pollution_service,
+    get_response_cache,
+)
+from city_pollution.routers.responses import (
+    ORJSONModelResponse,
+    cached_response,
+    negotiate_format,
+)
+from city_pollution.schemas.cursor import InvalidCursor
+from city_pollution.services.arrow import TABLE_MEDIA_TYPES
+from city_pollution.services.export import EXPORT_MEDIA_TYPES
+from city_pollution.services.response_cache import CachedResponse
 
 from city_pollution.schemas.pollution import (
     PollutionSchema,
+    PollutionChart,
     PollutionItemList,
     Dates,
     Aggregate,
+    ExportFormat,
+    ResponseFormat,
 )
 
 
@@ -23,9 +41,24 @@ router = APIRouter(
     operation_id="get_pollution_by_coordinates",
     summary="Get pollution data by coordinates",
     response_model=PollutionItemList,
+    response_class=ORJSONModelResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in TABLE_MEDIA_TYPES.values()},
+            "description": "JSON, an Arrow IPC stream or a Parquet file",
+        },
+        304: {"description": "The data didn't change since the If-None-Match ETag"},
+        406: {"description": "Arrow and Parquet need pyarrow to be installed"},
+    },
     description="Get pollution data by coordinates provided that coordinates match any city or town."
     "Loads only data from the database, ie, what is imported so far from external services."
-    "Has limit and offset parameters for possibility of pagination for front end",
+    "Has limit and offset parameters for possibility of pagination for front end. "
+    "For deep pages pass the next_cursor of the previous page as cursor instead of an offset. "
+    "Analytics clients can get the rows as an Arrow IPC stream "
+    "(Accept: application/vnd.apache.arrow.stream or format=arrow) or a Parquet file "
+    "(format=parquet), the cursor of the next page is then in the X-Next-Cursor header. "
+    "Responses carry an ETag, send it as If-None-Match to get 304 Not Modified while the "
+    "city's data is unchanged.",
 )
 async def get_pollution_data(
     aggregate: Aggregate = Aggregate.DAILY,
@@ -33,15 +66,125 @@ async def get_pollution_data(
     dates: Dates = Depends(),
     limit: Optional[int] = None,
     offset: Optional[int] = None,
-    db: Session = Depends(get_db),
-) -> PollutionItemList:
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page (daily data)"
+    ),
+    format: Optional[ResponseFormat] = Query(
+        None, description="Response format, overrides the Accept header"
+    ),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_db),
+) -> Response:
+    response_format = negotiate_format(format, accept)
+    pollution_service = await get_pollution_service()
+    try:
+        version = await pollution_service.get_data_version_service(city_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    cache = get_response_cache()
+    key = cache.key(
+        city_id,
+        version,
+        response_format.value,
+        aggregate.value,
+        dates.start,
+        dates.end,
+        limit,
+        offset,
+        cursor,
+    )
+
+    async def build() -> CachedResponse:
+        try:
+            if response_format == ResponseFormat.JSON:
+                result = await pollution_service.get_pollution_data_service(
+                    aggregate, city_id, dates, db, limit, offset, cursor
+                )
+                return CachedResponse(
+                    ORJSONModelResponse(result).body, "application/json"
+                )
+
+            table, next_cursor = await pollution_service.get_pollution_table_service(
+                aggregate, city_id, dates, response_format, db, limit, offset, cursor
+            )
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail=f"{response_format.value} responses need pyarrow to be installed",
+            )
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return CachedResponse(table, TABLE_MEDIA_TYPES[response_format], headers)
+
+    return await cached_response(cache, key, if_none_match, build)
+
+
+@router.get(
+    "/chart",
+    operation_id="get_pollution_chart_data",
+    summary="Get pollution chart data",
+    response_model=PollutionChart,
+    response_class=ORJSONModelResponse,
+    description="Get pollution data as column oriented arrays for client side charts: the dates "
+    "and one array per pollutant, with null for missing values. With max_points the "
+    "series are downsampled (LTTB) to at most that many dates, the points are shared by "
+    "all pollutants, which keep a common date axis.",
+)
+async def get_pollution_chart_data(
+    aggregate: Aggregate = Aggregate.DAILY,
+    city_id: int = Query(..., description="Id of city to get pollution data for"),
+    dates: Dates = Depends(),
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    max_points: Optional[int] = Query(
+        None, ge=3, description="Downsample the series to at most this many dates"
+    ),
+    db: DBSession = Depends(get_db),
+) -> ORJSONModelResponse:
+    try:
+        pollution_service = await get_pollution_service()
+        result = await pollution_service.get_pollution_chart_service(
+            aggregate, city_id, dates, db, limit, offset, max_points
+        )
+        return ORJSONModelResponse(result)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get(
+    "/export",
+    operation_id="export_pollution_data",
+    summary="Export pollution data",
+    response_class=StreamingResponse,
+    description="Stream the stored daily pollution of a city as NDJSON (an object per line) "
+    "or CSV. Rows are sent as they are read from the database, so exports of long "
+    "date ranges start right away and don't have to fit in memory.",
+)
+async def export_pollution_data(
+    city_id: int = Query(..., description="Id of city to export pollution data for"),
+    dates: Dates = Depends(),
+    format: ExportFormat = ExportFormat.NDJSON,
+    db: DBSession = Depends(get_db),
+) -> StreamingResponse:
     try:
         pollution_service = await get_pollution_service()
-        return await pollution_service.get_pollution_data_service(
-            aggregate, city_id, dates, db, limit, offset
+        chunks = await pollution_service.export_pollution_service(
+            city_id, dates, format, db
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    filename = f"pollution_{city_id}_{dates.start}_{dates.end}.{format.value}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.post(
@@ -50,11 +193,12 @@ async def get_pollution_data(
     summary="Import pollution data",
     description="Import pollution for given location. Location must match city or town"
     "that is fetched from external service if it's not already in database"
-    "Then pollution data is fetched from external service. Old pollution data is deleted if"
-    "exists for a given city/town.",
+    "Then pollution data is fetched from external service. In incremental mode (default) only"
+    "dates that are missing for a given city/town are fetched and existing data is left alone."
+    "In replace mode the whole range is fetched again and overwrites stored data.",
 )
 async def import_historical_pollution_by_coords(
-    pollution_params: PollutionSchema, db: Session = Depends(get_db)
+    pollution_params: PollutionSchema, db: DBSession = Depends(get_db)
 ) -> Dict[str, str]:
     try:
         pollution_service = await get_pollution_service()
@@ -72,7 +216,7 @@ async def import_historical_pollution_by_coords(
 async def delete_pollution_data(
     city_id: int,
     dates: Dates = Depends(),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ) -> Dict[str, Union[bool, int]]:
     try:
         pollution_service = await get_pollution_service()
@@ -0,0 +1,84 @@
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import orjson
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from city_pollution.schemas.pollution import ResponseFormat
+from city_pollution.services.arrow import TABLE_MEDIA_TYPES
+from city_pollution.services.response_cache import CachedResponse, ResponseCache
+
+
+class ORJSONModelResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. A pydantic model is dumped to Python
+    objects by pydantic-core and orjson serializes those, dates included.
+    Returning the response from a route skips FastAPI's response_model
+    processing, which validates the returned model again and encodes it
+    with jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return orjson.dumps(content)
+
+
+def negotiate_format(
+    response_format: Optional[ResponseFormat], accept: Optional[str]
+) -> ResponseFormat:
+    """
+    Format of a pollution response: the format parameter if given, otherwise
+    an Arrow stream or Parquet if the Accept header asks for it, JSON by default
+    """
+    if response_format is not None:
+        return response_format
+    accepted = {x.split(";")[0].strip().lower() for x in (accept or "").split(",")}
+    for table_format, media_type in TABLE_MEDIA_TYPES.items():
+        if media_type in accepted:
+            return table_format
+    return ResponseFormat.JSON
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    tags = [x.strip() for x in if_none_match.split(",")]
+    return any(x.removeprefix("W/") == etag for x in tags)
+
+
+async def cached_response(
+    cache: ResponseCache,
+    key: Tuple[Any, ...],
+    if_none_match: Optional[str],
+    build: Callable[[], Awaitable[CachedResponse]],
+) -> Response:
+    """
+    Answer from the response cache. A request with the current ETag gets
+    304 Not Modified and a cached response is returned as is, neither runs
+    a pollution query, otherwise the response is built and cached.
+
+    :param cache: Response cache
+    :param key: Cache key from ResponseCache.key
+    :param if_none_match: If-None-Match header of the request
+    :param build: Builds the response on a cache miss
+    :return: Response with the ETag
+    :rtype: Response
+    """
+    etag = cache.etag(key)
+    # clients revalidate every time, which is cheap with the ETag. The format
+    # can be negotiated with Accept, shared caches must keep them apart
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(if_none_match, etag):
+        cache.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cached = cache.get(key)
+    if cached is None:
+        cached = await build()
+        cache.set(key, cached)
+    return Response(
+        cached.body, media_type=cached.media_type, headers={**cached.headers, **headers}
+    )
@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Any, List, Tuple
+
+from city_pollution.entities import City, Pollution
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor wasn't created by encode_cursor for this listing"""
+
+
+def encode_cursor(kind: str, *values: Any) -> str:
+    """
+    Encode a keyset pagination position as an opaque, URL safe cursor
+    :param kind: What the cursor pages through, cursors of other kinds are rejected
+    :param values: Key of the last row of the page
+    :return: Cursor
+    :rtype: str
+    """
+    payload = json.dumps([kind, *values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str, size: int) -> List[Any]:
+    """
+    Decode a cursor created by encode_cursor
+    :param cursor: Cursor
+    :param kind: Expected kind of the cursor
+    :param size: Expected number of key values
+    :return: Key values
+    :rtype: List[Any]
+    :raises InvalidCursor: If the cursor is malformed or of another kind
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != size + 1 or values[0] != kind:
+        raise InvalidCursor("Invalid cursor")
+    return values[1:]
+
+
+def pollution_cursor(pollution: Pollution) -> str:
+    return encode_cursor("pollution", pollution.date.isoformat(), pollution.id)
+
+
+def decode_pollution_cursor(cursor: str) -> Tuple[date, int]:
+    after_date, after_id = decode_cursor(cursor, "pollution", 2)
+    try:
+        return date.fromisoformat(after_date), int(after_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor") from None
+
+
+def city_cursor(city: City) -> str:
+    return encode_cursor("city", city.id)
+
+
+def decode_city_cursor(cursor: str) -> int:
+    (after_id,) = decode_cursor(cursor, "city", 1)
+    if not isinstance(after_id, int):
+        raise InvalidCursor("Invalid cursor")
+    return after_id
@@ -1,9 +1,9 @@
 from datetime import date, datetime
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Optional, List, Sequence
 
 from fastapi import HTTPException, status
-from pydantic import BaseModel, Field, ConfigDict, model_validator
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, model_validator
 from pydantic_extra_types.coordinate import Longitude, Latitude
 
 from city_pollution.schemas.city import City
@@ -55,11 +55,32 @@ class Dates(BaseModel):
         return values
 
 
+class ImportMode(Enum):
+    INCREMENTAL = "incremental"
+    REPLACE = "replace"
+
+
+class ExportFormat(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ResponseFormat(Enum):
+    JSON = "json"
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
 class PollutionSchema(BaseModel):
     lat: Latitude
     lon: Longitude
     dates: Dates
     name: Optional[str] = None
+    mode: ImportMode = Field(
+        ImportMode.INCREMENTAL,
+        description="Incremental imports fetch only missing dates, "
+        "replace imports refetch the whole range",
+    )
 
 
 class PollutionItem(BaseModel):
@@ -78,6 +99,21 @@ class PollutionItem(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Validates a whole list of pollution items in a single pydantic-core call
+POLLUTION_ITEMS = TypeAdapter(List[PollutionItem])
+
+
+def pollution_items(pollution: Sequence[Any]) -> List[PollutionItem]:
+    """
+    Validate pollution as PollutionItems in one go
+
+    :param pollution: Dicts or objects with the PollutionItem attributes
+    :return: Pollution items
+    :rtype: List[PollutionItem]
+    """
+    return POLLUTION_ITEMS.validate_python(pollution, from_attributes=True)
+
+
 class PollutionItemList(BaseModel):
     data: List[PollutionItem]
     city: City
@@ -85,6 +121,26 @@ class PollutionItemList(BaseModel):
     end: Optional[date]
     gaps: Optional[bool] = None
     plot_url: Optional[str] = None
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, set when the page is full"
+    )
+
+
+class PollutionChart(BaseModel):
+    """Column oriented pollution series, values are aligned with dates"""
+
+    city: City
+    dates: List[date]
+    co: List[Optional[float]]
+    no: List[Optional[float]]
+    no2: List[Optional[float]]
+    o3: List[Optional[float]]
+    so2: List[Optional[float]]
+    pm2_5: List[Optional[float]]
+    pm10: List[Optional[float]]
+    nh3: List[Optional[float]]
+    gaps: Optional[bool] = None
+    downsampled: bool = False
 
 
 class Aggregate(Enum):
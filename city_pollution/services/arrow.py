@@ -0,0 +1,63 @@
+from typing import Any, Sequence, TYPE_CHECKING, cast
+
+from city_pollution.db.models.pollution import POLLUTANT_COLUMNS
+from city_pollution.schemas.pollution import ResponseFormat
+from city_pollution.services.export import EXPORT_COLUMNS, row_values
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+TABLE_MEDIA_TYPES = {
+    ResponseFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ResponseFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def pollution_arrow_table(pollution: Sequence[Any]) -> "pa.Table":
+    """
+    Build an Arrow table from pollution rows, a column per EXPORT_COLUMNS
+
+    :param pollution: Pollution rows or Pollution instances
+    :return: Arrow table
+    :rtype: pa.Table
+    """
+    # imported here, pyarrow is an optional dependency (the arrow extra)
+    import pyarrow as pa
+
+    types = {column: pa.float64() for column in POLLUTANT_COLUMNS}
+    types.update(id=pa.int64(), date=pa.date32(), city_id=pa.int64())
+    schema = pa.schema([(column, types[column]) for column in EXPORT_COLUMNS])
+
+    columns = list(zip(*(row_values(x) for x in pollution)))
+    if not columns:
+        return schema.empty_table()
+    return pa.table(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def encode_pollution_table(
+    pollution: Sequence[Any], table_format: ResponseFormat
+) -> bytes:
+    """
+    Encode pollution rows as an Arrow IPC stream or a Parquet file
+
+    :param pollution: Pollution rows or Pollution instances
+    :param table_format: ResponseFormat.ARROW or ResponseFormat.PARQUET
+    :return: Encoded table
+    :rtype: bytes
+    :raises ImportError: If pyarrow isn't installed
+    """
+    import pyarrow as pa
+
+    table = pollution_arrow_table(pollution)
+    sink = pa.BufferOutputStream()
+    if table_format == ResponseFormat.PARQUET:
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return cast(bytes, sink.getvalue().to_pybytes())
@@ -1,8 +1,12 @@
+import asyncio
 from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
 
 from city_pollution.entities import City
-from city_pollution.services.geocoder_service import GeocoderService
+from city_pollution.services.geocoder_service import (
+    GeocoderService,
+    GeocoderServiceInterface,
+)
 
 TOLERANCE = 0.5  # degrees
 
@@ -33,7 +37,7 @@ class CityServiceInterface(ABC):
 class CityService(CityServiceInterface):
     """Service for city-related operations"""
 
-    def __init__(self, geocoder_service: GeocoderService):
+    def __init__(self, geocoder_service: GeocoderServiceInterface):
         self.geocoder_service = geocoder_service
 
     def city_from_raw_data(self, raw_data: Dict[Any, Any]) -> City | None:
@@ -87,10 +91,15 @@ class CityService(CityServiceInterface):
         :param city_name: City name
         :return:
         """
-        city_by_geocode = await self.geocoder_service.get_reverse_geocode(lat, lon)
-        city_by_name = []
         if city_name:
-            city_by_name = await self.geocoder_service.get_city_by_name(city_name)
+            # both lookups are independent, so run them concurrently
+            city_by_geocode, city_by_name = await asyncio.gather(
+                self.geocoder_service.get_reverse_geocode(lat, lon),
+                self.geocoder_service.get_city_by_name(city_name),
+            )
+        else:
+            city_by_geocode = await self.geocoder_service.get_reverse_geocode(lat, lon)
+            city_by_name = []
         all_cities = city_by_name + city_by_geocode
         if all_cities is not None:
             cities = await self.extract_cities_from_raw_data(all_cities)
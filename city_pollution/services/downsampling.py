@@ -0,0 +1,131 @@
+from datetime import date
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling. Keeps the first and the
+    last point and from every bucket in between the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket. Work per bucket is vectorized, so the Python loop runs
+    threshold times whatever the length of the series.
+
+    :param x: Increasing x values
+    :param y: Y values, without NaNs
+    :param threshold: Number of points to keep
+    :return: Indices of the kept points
+    :rtype: np.ndarray
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    indices = np.empty(threshold, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def float_array(values: Sequence[Optional[float]]) -> np.ndarray:
+    """
+    Convert values to a float array, missing values become NaN
+
+    :param values: Values, None for missing values
+    :return: Float array of the values
+    :rtype: np.ndarray
+    """
+    return np.array([np.nan if value is None else float(value) for value in values])
+
+
+def downsample_points(
+    dates: Sequence[date], values: Sequence[Optional[float]], max_points: int
+) -> Tuple[List[date], List[float]]:
+    """
+    Downsample a single series with LTTB, dropping missing values
+
+    :param dates: Dates of the values
+    :param values: Values, None for missing values
+    :param max_points: Number of points to keep
+    :return: Kept dates and values
+    :rtype: Tuple[List[date], List[float]]
+    """
+    y = float_array(values)
+    valid = np.flatnonzero(~np.isnan(y))
+    if max_points > 0 and len(valid) > max_points:
+        x = np.array([float(dates[int(i)].toordinal()) for i in valid])
+        valid = valid[lttb_indices(x, y[valid], max_points)]
+    return [dates[int(i)] for i in valid], y[valid].tolist()
+
+
+def downsample_indices(
+    dates: Sequence[date],
+    series: Mapping[str, Sequence[Optional[float]]],
+    max_points: int,
+) -> List[int]:
+    """
+    Pick the points to keep of series sharing the same dates. The budget is
+    split between the series with values, every series is downsampled with
+    LTTB on its own non-null values and the union of the kept points is
+    returned, so the series keep a common date axis and each of them keeps
+    its shape. LTTB keeps at least 3 points per series, if that's more than
+    the budget the union is thinned evenly.
+
+    :param dates: Dates of the values
+    :param series: Values keyed by name, None for missing values
+    :param max_points: Number of points to keep at most, for all series
+    :return: Sorted indices of the kept points
+    :rtype: List[int]
+    """
+    if max_points <= 0 or len(dates) <= max_points:
+        return list(range(len(dates)))
+
+    x = np.array([d.toordinal() for d in dates], dtype=float)
+    ys = [float_array(values) for values in series.values()]
+    valid = [np.flatnonzero(~np.isnan(y)) for y in ys]
+    with_values = sum(1 for indices in valid if len(indices))
+    threshold = max(3, max_points // max(with_values, 1))
+
+    selected = set()
+    for y, indices in zip(ys, valid):
+        if len(indices):
+            selected.update(
+                indices[lttb_indices(x[indices], y[indices], threshold)].tolist()
+            )
+    kept = sorted(selected)
+    if len(kept) > max_points:
+        positions = np.linspace(0, len(kept) - 1, max_points).round().astype(np.intp)
+        kept = [kept[i] for i in positions]
+    return kept
+
+
+def downsample_series(
+    dates: Sequence[date],
+    series: Mapping[str, Sequence[Optional[float]]],
+    max_points: int,
+) -> Tuple[List[date], Dict[str, List[Optional[float]]]]:
+    """
+    Downsample series sharing the same dates, see downsample_indices.
+    Missing values at the kept dates stay None.
+    """
+    indices = downsample_indices(dates, series, max_points)
+    return (
+        [dates[i] for i in indices],
+        {name: [values[i] for i in indices] for name, values in series.items()},
+    )
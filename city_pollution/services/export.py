@@ -0,0 +1,69 @@
+import csv
+import io
+from typing import Any, AsyncIterator, List, Sequence, Tuple
+
+import orjson
+from sqlalchemy import Row
+
+from city_pollution.db.models.pollution import pollution_table
+from city_pollution.schemas.pollution import ExportFormat
+
+# Exported columns, in the order pollution_rows_statement selects them. Plain
+# str, orjson doesn't take the str subclass SQLAlchemy uses as dict keys
+EXPORT_COLUMNS = tuple(str(x) for x in pollution_table.c.keys())
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def row_values(row: Any) -> Tuple[Any, ...]:
+    """Values of a pollution row or Pollution instance, in EXPORT_COLUMNS order"""
+    if isinstance(row, Row):
+        return tuple(row)
+    return tuple(getattr(row, column) for column in EXPORT_COLUMNS)
+
+
+def encode_rows(
+    rows: Sequence[Any], export_format: ExportFormat, header: bool = False
+) -> bytes:
+    """
+    Encode a batch of pollution rows
+
+    :param rows: Pollution rows or Pollution instances
+    :param export_format: NDJSON, an object per line, or CSV
+    :param header: Start with the CSV header
+    :return: Encoded rows
+    :rtype: bytes
+    """
+    if export_format == ExportFormat.NDJSON:
+        return b"".join(
+            orjson.dumps(dict(zip(EXPORT_COLUMNS, row_values(row)))) + b"\n"
+            for row in rows
+        )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(row_values(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def export_chunks(
+    batches: AsyncIterator[List[Any]], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Encode batches of pollution rows as they are read, so only one batch is
+    held in memory whatever the size of the export
+
+    :param batches: Batches from stream_pollution_rows
+    :param export_format: Export format
+    :return: Encoded chunks, the CSV header is sent even if there are no rows
+    :rtype: AsyncIterator[bytes]
+    """
+    if export_format == ExportFormat.CSV:
+        yield encode_rows([], export_format, header=True)
+    async for batch in batches:
+        yield encode_rows(batch, export_format)
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import AbstractContextManager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from city_pollution.config.settings import settings
+from city_pollution.services.geocoder_service import GeocoderServiceInterface
+
+_MISSING = object()
+
+
+class GeocoderCache:
+    """
+    Two level cache for geocoder results: an in-memory LRU backed by the
+    persistent geocoder_cache table. Empty results are cached as well,
+    with a shorter TTL.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        precision: Optional[int] = None,
+        session_factory: Optional[Callable[[], AbstractContextManager[Any]]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_size = (
+            max_size if max_size is not None else settings.geocoder_cache_size
+        )
+        self.ttl = ttl if ttl is not None else settings.geocoder_cache_ttl
+        self.negative_ttl = (
+            negative_ttl
+            if negative_ttl is not None
+            else settings.geocoder_cache_negative_ttl
+        )
+        self.precision = (
+            precision if precision is not None else settings.geocoder_cache_precision
+        )
+        self.session_factory = session_factory
+        self.clock = clock
+        self._entries: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    def reverse_key(self, lat: float, lon: float) -> str:
+        """
+        Cache key for reverse geocoding, coordinates are rounded so nearby
+        lookups share an entry
+        """
+        return f"reverse:{round(lat, self.precision)}:{round(lon, self.precision)}"
+
+    def name_key(self, name: str) -> str:
+        """Cache key for forward geocoding by a normalized name"""
+        normalized = unicodedata.normalize("NFKC", name).casefold()
+        normalized = re.sub(r"\s+", " ", normalized).strip()
+        return f"forward:{normalized}"
+
+    async def get(self, key: str) -> Any:
+        """
+        Get the cached value for the key
+        :param key: Cache key
+        :return: Cached value or _MISSING if there is no valid entry
+        """
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._record_hit(value)
+                return value
+            del self._entries[key]
+
+        if self.session_factory is not None:
+            persistent = await self._run_persistent(
+                lambda repo: repo.get_entry(key, int(now))
+            )
+            if persistent is not None:
+                value, expires_at = persistent
+                self._store(key, value, expires_at)
+                self.persistent_hits += 1
+                self._record_hit(value)
+                return value
+
+        self.misses += 1
+        return _MISSING
+
+    async def set(self, key: str, value: Any) -> None:
+        ttl = self.ttl if value else self.negative_ttl
+        expires_at = self.clock() + ttl
+        self._store(key, value, expires_at)
+        if self.session_factory is not None:
+            await self._run_persistent(
+                lambda repo: repo.set_entry(key, value, int(expires_at))
+            )
+
+    async def purge_expired(self) -> None:
+        """Drop expired entries from the persistent cache"""
+        if self.session_factory is not None:
+            now = int(self.clock())
+            await self._run_persistent(lambda repo: repo.delete_expired(now))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+        }
+
+    def _record_hit(self, value: Any) -> None:
+        self.hits += 1
+        if not value:
+            self.negative_hits += 1
+
+    def _store(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _run_persistent(self, operation: Callable[[Any], Any]) -> Any:
+        """
+        Run an operation on the persistent cache in a worker thread. The
+        persistent layer is best effort, errors only disable it for this call.
+        """
+        from city_pollution.db.repositories.geocoder_cache_repository import (
+            GeocoderCacheRepository,
+        )
+
+        session_factory = self.session_factory
+        if session_factory is None:
+            return None
+
+        def run() -> Any:
+            with session_factory() as db:
+                return operation(GeocoderCacheRepository(db))
+
+        try:
+            return await asyncio.to_thread(run)
+        except Exception as e:
+            logging.warning(f"Persistent geocoder cache unavailable: {e}")
+            return None
+
+
+class CachedGeocoderService(GeocoderServiceInterface):
+    """Geocoder service answering from GeocoderCache before calling the geocoder"""
+
+    def __init__(
+        self, geocoder_service: GeocoderServiceInterface, cache: GeocoderCache
+    ):
+        self.geocoder_service = geocoder_service
+        self.cache = cache
+
+    async def get_reverse_geocode(self, lat: float, lon: float) -> Any:
+        key = self.cache.reverse_key(lat, lon)
+        result = await self.cache.get(key)
+        if result is _MISSING:
+            result = await self.geocoder_service.get_reverse_geocode(lat, lon)
+            await self.cache.set(key, result)
+        return result
+
+    async def get_city_by_name(self, name: str) -> Any:
+        key = self.cache.name_key(name)
+        result = await self.cache.get(key)
+        if result is _MISSING:
+            result = await self.geocoder_service.get_city_by_name(name)
+            await self.cache.set(key, result)
+        return result
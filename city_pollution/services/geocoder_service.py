@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 from abc import ABC, abstractmethod
 
@@ -19,16 +20,16 @@ class GeocoderServiceInterface(ABC):
 class GeocoderService(GeocoderServiceInterface):
     """Service for geocoding operations"""
 
-    def __init__(self, geocoder=None):
+    def __init__(self, geocoder: Any = None) -> None:
         self._geocoder = geocoder
 
-    async def _get_geocoder(self):
-        """Get geocoder instance, creating it if needed"""
+    async def _get_geocoder(self) -> Any:
+        """Get the injected geocoder instance or the shared one"""
         from city_pollution.dependencies import get_geocoder
 
-        if self._geocoder is None:
-            self._geocoder = await get_geocoder()
-        return self._geocoder
+        if self._geocoder is not None:
+            return self._geocoder
+        return await get_geocoder()
 
     async def get_reverse_geocode(self, lat: float, lon: float) -> Any:
         """
@@ -40,8 +41,9 @@ class GeocoderService(GeocoderServiceInterface):
         :rtype: Any
         """
         geocoder = await self._get_geocoder()
-        locs_by_reverse = geocoder.reverse_geocode(lat, lon)
-        return locs_by_reverse
+        if self._has_async_session(geocoder):
+            return await geocoder.reverse_geocode_async(lat, lon)
+        return await asyncio.to_thread(geocoder.reverse_geocode, lat, lon)
 
     async def get_city_by_name(self, name: str) -> Any:
         """
@@ -51,7 +53,19 @@ class GeocoderService(GeocoderServiceInterface):
         :rtype: Any
         """
         geocoder = await self._get_geocoder()
-        return geocoder.geocode(name)
+        if self._has_async_session(geocoder):
+            return await geocoder.geocode_async(name)
+        return await asyncio.to_thread(geocoder.geocode, name)
+
+    def _has_async_session(self, geocoder: Any) -> bool:
+        """
+        Geocoders opened with `async with`, like the shared one, have an
+        aiohttp session and can be awaited. Others are run in a worker
+        thread so they don't block the event loop.
+        """
+        import aiohttp
+
+        return isinstance(getattr(geocoder, "session", None), aiohttp.ClientSession)
 
 
 # Legacy function wrappers for backward compatibility
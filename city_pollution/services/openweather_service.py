@@ -1,11 +1,15 @@
-from typing import List, Dict, Any
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
 from abc import ABC, abstractmethod
 
 from fastapi import HTTPException
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, Timeout, TransportError
 
 from city_pollution.config.settings import settings
 
+SECONDS_IN_DAY = 24 * 60 * 60
+
 
 class OpenWeatherServiceInterface(ABC):
     """Interface for OpenWeather service operations"""
@@ -17,13 +21,66 @@ class OpenWeatherServiceInterface(ABC):
         """Get pollution data from OpenWeather API"""
         pass
 
+    @abstractmethod
+    async def get_pollution_data_windowed(
+        self, lat: float, lon: float, start: int, end: int
+    ) -> List[Dict[str, Any]]:
+        """Get pollution data from OpenWeather API in concurrent windows"""
+        pass
+
+    @abstractmethod
+    async def get_pollution_data_ranges(
+        self, lat: float, lon: float, ranges: List[Tuple[int, int]]
+    ) -> List[Dict[str, Any]]:
+        """Get pollution data from OpenWeather API for several ranges"""
+        pass
+
 
 class OpenWeatherService(OpenWeatherServiceInterface):
     """Service for OpenWeather API operations"""
 
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str = None,
+        client: Optional[AsyncClient] = None,
+    ):
         self.api_key = api_key or settings.openweather_key
         self.base_url = base_url or settings.openweather_url
+        self._client = client
+
+    def _get_client(self) -> AsyncClient:
+        """
+        Get the pooled HTTP client, creating it on first use. The client is
+        shared by every request made through this service, so connections
+        (and TLS sessions) are kept alive between imports.
+        :return: Shared async HTTP client
+        :rtype: AsyncClient
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = AsyncClient(
+                http2=settings.openweather_http2,
+                limits=Limits(
+                    max_connections=settings.openweather_max_connections,
+                    max_keepalive_connections=settings.openweather_max_keepalive_connections,
+                    keepalive_expiry=settings.openweather_keepalive_expiry,
+                ),
+                timeout=Timeout(
+                    settings.openweather_timeout,
+                    connect=settings.openweather_connect_timeout,
+                ),
+            )
+        return self._client
+
+    def open(self) -> None:
+        """Create the pooled HTTP client up front"""
+        self._get_client()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and release its connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_pollution_data(
         self, lat: float, lon: float, start: int, end: int
@@ -40,25 +97,170 @@ class OpenWeatherService(OpenWeatherServiceInterface):
         :type: int
         :return: list of pollution data in dictionary format
         :rtype: List[Dict[str, Any]]
+        :raises ValueError: If there is no pollution data for the range
         """
-        async with AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}?lat={lat}&lon={lon}&start={start}&end={end}&appid={self.api_key}"
-            )
+        pollutions_list = await self._request_pollution_data(lat, lon, start, end)
+        if len(pollutions_list) > 0:
+            return pollutions_list
+        raise ValueError("Pollution data not found")
 
-        if response.status_code == 200:
-            pollutions_list = []
-            if len(response.json()["list"]) > 0:
-                pollutions = response.json()["list"]
-                for pollution in pollutions:
-                    d = pollution["components"]
-                    d["timestamp"] = pollution["dt"]
-                    pollutions_list.append(d)
-                return pollutions_list
-        raise HTTPException(
-            status_code=response.status_code, detail="Couldn't retrieve pollution data"
+    async def get_pollution_data_windowed(
+        self, lat: float, lon: float, start: int, end: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve pollution data for a long range by splitting it into windows
+        that are fetched concurrently. Each window is retried on its own if it
+        fails, and the results are merged in timestamp order.
+        :param lat: Latitude
+        :type: float
+        :param lon: Longitude
+        :type: float
+        :param start: starting point for pollution data
+        :type: int
+        :param end: ending point for pollution data
+        :type: int
+        :return: list of pollution data in dictionary format, empty if there is none
+        :rtype: List[Dict[str, Any]]
+        """
+        return await self.get_pollution_data_ranges(lat, lon, [(start, end)])
+
+    async def get_pollution_data_ranges(
+        self, lat: float, lon: float, ranges: List[Tuple[int, int]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve pollution data for several disjoint ranges at once. Every range
+        is split into windows and all windows share one concurrency limit.
+        :param lat: Latitude
+        :type: float
+        :param lon: Longitude
+        :type: float
+        :param ranges: list of (start, end) timestamp pairs
+        :type: List[Tuple[int, int]]
+        :return: list of pollution data in dictionary format, empty if there is none
+        :rtype: List[Dict[str, Any]]
+        """
+        semaphore = asyncio.Semaphore(settings.openweather_max_concurrency)
+        window = settings.openweather_window_days * SECONDS_IN_DAY
+        windows = [
+            split_window
+            for start, end in ranges
+            for split_window in split_into_windows(start, end, window)
+        ]
+        # a window that fails for good cancels the ones still in flight, and
+        # its error is raised as is, like gather did, rather than as a group
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [
+                    group.create_task(
+                        self._fetch_window(
+                            lat, lon, window_start, window_end, semaphore
+                        )
+                    )
+                    for window_start, window_end in windows
+                ]
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+        results = [task.result() for task in tasks]
+
+        # windows share their boundaries, so merge by timestamp
+        merged: Dict[int, Dict[str, Any]] = {}
+        for window_data in results:
+            for pollution in window_data:
+                merged[pollution["timestamp"]] = pollution
+        return [merged[timestamp] for timestamp in sorted(merged)]
+
+    async def _fetch_window(
+        self,
+        lat: float,
+        lon: float,
+        start: int,
+        end: int,
+        semaphore: asyncio.Semaphore,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch a single window, retrying transient failures with exponential backoff
+        :param semaphore: Semaphore bounding the number of concurrent requests
+        :type: asyncio.Semaphore
+        :return: list of pollution data in dictionary format
+        :rtype: List[Dict[str, Any]]
+        """
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    return await self._request_pollution_data(lat, lon, start, end)
+            except (HTTPException, TransportError) as e:
+                retryable = isinstance(e, TransportError) or (
+                    e.status_code == 429 or e.status_code >= 500
+                )
+                if not retryable or attempt >= settings.openweather_max_retries:
+                    raise
+                delay = settings.openweather_retry_backoff * 2**attempt
+                attempt += 1
+                logging.warning(
+                    f"Retrying pollution window {start}-{end} in {delay}s "
+                    f"(attempt {attempt}): {e}"
+                )
+                await asyncio.sleep(delay)
+
+    async def _request_pollution_data(
+        self, lat: float, lon: float, start: int, end: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Make a single request to OpenWeatherMap
+        :return: list of pollution data in dictionary format, empty if there is none
+        :rtype: List[Dict[str, Any]]
+        """
+        client = self._get_client()
+        response = await client.get(
+            self.base_url,
+            params={
+                "lat": lat,
+                "lon": lon,
+                "start": start,
+                "end": end,
+                "appid": self.api_key,
+            },
         )
 
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail="Couldn't retrieve pollution data",
+            )
+
+        pollutions_list = []
+        for pollution in response.json()["list"]:
+            d = pollution["components"]
+            d["timestamp"] = pollution["dt"]
+            pollutions_list.append(d)
+        return pollutions_list
+
+
+def split_into_windows(start: int, end: int, window: int) -> List[Tuple[int, int]]:
+    """
+    Split the start-end timestamp range into consecutive windows
+    :param start: Start timestamp
+    :type: int
+    :param end: End timestamp
+    :type: int
+    :param window: Window length in seconds
+    :type: int
+    :return: list of (start, end) timestamp pairs covering the range
+    :rtype: List[Tuple[int, int]]
+    :raises ValueError: If the window length is not positive
+    """
+    if window <= 0:
+        raise ValueError("Window length must be positive")
+    windows = []
+    window_start = start
+    while True:
+        window_end = min(window_start + window, end)
+        windows.append((window_start, window_end))
+        if window_end >= end:
+            return windows
+        window_start = window_end
+
 
 # Legacy function wrapper for backward compatibility
 async def get_pollution_data(
@@ -66,4 +268,7 @@ async def get_pollution_data(
 ) -> List[Dict[str, Any]]:
     """Legacy function wrapper - deprecated, use OpenWeatherService instead"""
     service = OpenWeatherService()
-    return await service.get_pollution_data(lat, lon, start, end)
+    try:
+        return await service.get_pollution_data(lat, lon, start, end)
+    finally:
+        await service.aclose()
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from city_pollution.config.settings import settings
+from city_pollution.schemas.pollution import Aggregate
+
+PLOT_FILENAME_PATTERN = re.compile(
+    r"(?P<city_id>\d+)_(?P<start>\d{8})_(?P<end>\d{8})_"
+    rf"(?P<aggregate>{'|'.join(x.value for x in Aggregate)})_"
+    r"(?P<limit>\d*)_(?P<offset>\d*)_(?P<after>(?:\d{8}-\d+)?)_"
+    r"v(?P<version>\d+)_(?P<digest>[0-9a-f]{24})\.png"
+)
+
+
+@dataclass(frozen=True)
+class PlotQuery:
+    """Pollution query a plot is rendered for"""
+
+    city_id: int
+    start: date
+    end: date
+    aggregate: str
+    limit: Optional[int] = None
+    offset: Optional[int] = None
+    after: Optional[Tuple[date, int]] = None
+    # data version of the city the plot was issued for
+    version: int = 0
+
+
+class PlotCache:
+    """
+    Content addressed store for rendered pollution plots. Plot filenames
+    encode the query and the city's data version with a digest of both, so
+    identical queries reuse the rendered file, any change to the city's data
+    produces a new name and a plot can be rendered from its filename alone.
+    Data versions are stored in the database, so issued filenames stay valid
+    across restarts and in every worker until the data changes.
+    """
+
+    def __init__(self, plots_dir: Optional[Path] = None):
+        self.plots_dir = Path(plots_dir or settings.temp_dir)
+        # when plots were last served, used by PlotStoreManager for LRU eviction
+        self.last_served: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def remove_plots(self, city_id: Optional[int]) -> None:
+        """
+        Remove the rendered plots of a city, of all cities if None. Called
+        after the city's data changed, the plots can't be served anymore.
+        Blocking file system work, run it in a thread from async code.
+        """
+        if not self.plots_dir.exists():
+            return
+        pattern = "*.png" if city_id is None else f"{city_id}_*.png"
+        for path in self.plots_dir.glob(pattern):
+            self.last_served.pop(path.name, None)
+            try:
+                path.unlink()
+            except OSError as e:
+                logging.warning(f"Could not remove cached plot {path}: {e}")
+
+    def plot_filename(
+        self,
+        city_id: int,
+        start: date,
+        end: date,
+        aggregate: str,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+        version: int = 0,
+    ) -> str:
+        """
+        Deterministic filename for a plot of the given query
+        :param city_id: Id of the city
+        :param start: Start of the queried date range
+        :param end: End of the queried date range
+        :param aggregate: Aggregate of the queried data
+        :param limit: Limit of the queried data
+        :param offset: Offset of the queried data
+        :param after: Keyset pagination (date, id) of the queried data
+        :param version: Current data version of the city
+        :return: Plot filename
+        :rtype: str
+        """
+        key = "|".join(
+            str(x)
+            for x in (
+                city_id,
+                start,
+                end,
+                aggregate,
+                limit,
+                offset,
+                after,
+                version,
+            )
+        )
+        digest = hashlib.sha256(key.encode()).hexdigest()[:24]
+        after_key = "" if after is None else f"{after[0]:%Y%m%d}-{after[1]}"
+        return (
+            f"{city_id}_{start:%Y%m%d}_{end:%Y%m%d}_{aggregate}_"
+            f"{'' if limit is None else limit}_{'' if offset is None else offset}_"
+            f"{after_key}_v{version}_{digest}.png"
+        )
+
+    def parse_filename(self, filename: str) -> Optional[PlotQuery]:
+        """
+        Get the query of a plot filename issued by plot_filename
+        :param filename: Plot filename
+        :return: The query or None if the filename isn't valid. Whether its
+            version is still current is up to the caller.
+        :rtype: Optional[PlotQuery]
+        """
+        match = PLOT_FILENAME_PATTERN.fullmatch(filename)
+        if match is None:
+            return None
+        try:
+            after = None
+            if match["after"]:
+                after_date, after_id = match["after"].split("-")
+                after = (datetime.strptime(after_date, "%Y%m%d").date(), int(after_id))
+            query = PlotQuery(
+                city_id=int(match["city_id"]),
+                start=datetime.strptime(match["start"], "%Y%m%d").date(),
+                end=datetime.strptime(match["end"], "%Y%m%d").date(),
+                aggregate=match["aggregate"],
+                limit=int(match["limit"]) if match["limit"] else None,
+                offset=int(match["offset"]) if match["offset"] else None,
+                after=after,
+                version=int(match["version"]),
+            )
+        except ValueError:
+            return None
+        if self.query_filename(query) != filename:
+            return None
+        return query
+
+    def query_filename(self, query: PlotQuery) -> str:
+        return self.plot_filename(
+            query.city_id,
+            query.start,
+            query.end,
+            query.aggregate,
+            query.limit,
+            query.offset,
+            query.after,
+            query.version,
+        )
+
+    def path(self, filename: str) -> Path:
+        return self.plots_dir / filename
+
+    def url(self, filename: str) -> str:
+        return f"{settings.plots_url_base}/{filename}"
+
+    def get(self, filename: str) -> Optional[str]:
+        """
+        Get the URL of an already rendered plot
+        :param filename: Plot filename
+        :return: URL of the plot or None if it isn't rendered yet
+        """
+        if self.path(filename).exists():
+            self.hits += 1
+            self.last_served[filename] = time.time()
+            return self.url(filename)
+        self.misses += 1
+        return None
+
+    def temporary_path(self, filename: str) -> Path:
+        """
+        Path to render into before publishing the plot with os.replace, so
+        readers never see a partially written file
+        """
+        self.plots_dir.mkdir(parents=True, exist_ok=True)
+        return self.plots_dir / f".{filename}.{uuid.uuid4().hex}.tmp"
+
+    def publish(self, temporary_path: Path, filename: str) -> str:
+        os.replace(temporary_path, self.path(filename))
+        self.last_served[filename] = time.time()
+        return self.url(filename)
@@ -0,0 +1,198 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from city_pollution.config.settings import settings
+from city_pollution.db.models.pollution import POLLUTANT_COLUMNS
+from city_pollution.entities import Pollution
+
+# Subplot titles of the pollutant columns, in plotting order
+POLLUTANT_TITLES = {
+    "co": "CO",
+    "no": "NO",
+    "no2": "NO2",
+    "o3": "O3",
+    "so2": "SO2",
+    "pm2_5": "PM2.5",
+    "pm10": "PM10",
+    "nh3": "NH3",
+}
+
+
+class PlotRendererBusy(Exception):
+    """Raised when too many plots are already waiting to be rendered"""
+
+
+def pollution_series(
+    pollution_data: Sequence[Pollution],
+    max_points: Optional[int] = None,
+) -> Tuple[List[date], Dict[str, List[Optional[float]]]]:
+    """
+    Extract the dates and a value series per pollutant from pollution data
+
+    :param pollution_data: List of Pollution instances
+    :param max_points: Downsample the series with LTTB keeping a common date
+        axis, see downsample_series. No downsampling if not given
+    :return: Dates and values keyed by pollutant column
+    :rtype: Tuple[List[date], Dict[str, List[Optional[float]]]]
+    """
+    dates = [p.date for p in pollution_data]
+    series = {
+        column: [getattr(p, column) for p in pollution_data]
+        for column in POLLUTANT_COLUMNS
+    }
+    if max_points:
+        # numpy is only imported once something needs downsampling
+        from city_pollution.services.downsampling import downsample_series
+
+        return downsample_series(dates, series, max_points)
+    return dates, series
+
+
+def render_pollution_plot(
+    path: str,
+    title: str,
+    dates: List[date],
+    series: Dict[str, List[Optional[float]]],
+    max_points: Optional[int] = None,
+) -> None:
+    """
+    Render pollution series into a PNG, one subplot per pollutant. Uses the
+    object oriented Figure API with the Agg canvas instead of pyplot, so there
+    is no global figure state and it is safe to run in threads and worker
+    processes.
+
+    :param path: Path of the PNG to write
+    :param title: Figure title
+    :param dates: Dates of the values
+    :param series: Values keyed by pollutant column
+    :param max_points: Downsample each pollutant to this many points with
+        LTTB, so render time doesn't grow with the date range
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from city_pollution.services.downsampling import downsample_points
+
+    # Create a figure with multiple subplots for each pollutant
+    fig = Figure(figsize=(14, 16))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(4, 2)
+    fig.suptitle(title, fontsize=16)
+
+    # Plot each pollutant on its own subplot
+    for i, (column, pollutant) in enumerate(POLLUTANT_TITLES.items()):
+        row, col = divmod(i, 2)
+        ax = axes[row, col]
+
+        # Filter out None values
+        plot_dates, plot_values = downsample_points(
+            dates, series.get(column, [None] * len(dates)), max_points or 0
+        )
+        if plot_dates:
+            ax.plot(plot_dates, plot_values, marker="o", linestyle="-", markersize=4)
+            ax.set_title(pollutant)
+            ax.set_ylabel("Concentration")
+            ax.grid(True)
+
+            # Set x-axis labels to be readable
+            if len(plot_dates) > 10:
+                # Show fewer x-ticks if there are many dates
+                step = max(1, len(plot_dates) // 10)
+                ax.set_xticks(plot_dates[::step])
+
+            ax.tick_params(axis="x", rotation=45)
+        else:
+            ax.text(
+                0.5,
+                0.5,
+                f"No data for {pollutant}",
+                horizontalalignment="center",
+                verticalalignment="center",
+                transform=ax.transAxes,
+            )
+
+    # Adjust layout
+    fig.tight_layout(rect=(0.0, 0.0, 1.0, 0.96))
+    fig.savefig(path, format="png")
+
+
+class PlotRenderer:
+    """
+    Renders pollution plots in a bounded process pool, so CPU heavy rendering
+    neither blocks the event loop nor holds the GIL of the API process
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_queue: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or settings.plot_render_workers
+        self.timeout = timeout if timeout is not None else settings.plot_render_timeout
+        self.max_queue = (
+            max_queue if max_queue is not None else settings.plot_render_queue_size
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, forking a process running an event loop and threads isn't safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def render(
+        self,
+        path: str,
+        title: str,
+        dates: List[date],
+        series: Dict[str, List[Optional[float]]],
+        max_points: Optional[int] = None,
+    ) -> None:
+        """
+        Render a pollution plot in the process pool
+
+        :param path: Path of the PNG to write
+        :param title: Figure title
+        :param dates: Dates of the values
+        :param series: Values keyed by pollutant column
+        :param max_points: Downsample each pollutant to this many points
+        :raises PlotRendererBusy: If max_queue renders are already in progress
+        :raises TimeoutError: If rendering takes longer than the timeout
+        """
+        if self.pending >= self.max_queue:
+            raise PlotRendererBusy("Too many plots are being rendered, try again later")
+
+        future = self._get_executor().submit(
+            render_pollution_plot, path, title, dates, series, max_points
+        )
+        # the slot is held until the worker is done, a timed out render keeps
+        # running in its process and still counts towards max_queue
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._release(loop))
+        await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Free a render slot, called from the executor's thread"""
+
+        def release() -> None:
+            self.pending -= 1
+
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # the loop is closed, nothing is waiting for the slot anymore
+            pass
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from city_pollution.config.settings import settings
+from city_pollution.services.plot_cache import PlotCache
+
+
+class PlotStoreManager:
+    """
+    Keeps the plots directory within a byte budget. Plots not served for
+    longer than max_age are removed, then the least recently served ones
+    until the directory fits into max_bytes. Leftover temporary files of
+    interrupted renders are removed as well.
+    """
+
+    def __init__(
+        self,
+        plot_cache: PlotCache,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[int] = None,
+        interval: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.plot_cache = plot_cache
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else settings.plots_max_bytes
+        )
+        self.max_age = max_age if max_age is not None else settings.plots_max_age
+        self.interval = (
+            interval if interval is not None else settings.plots_eviction_interval
+        )
+        self.clock = clock
+        self.size = 0
+        self.files = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def evict(self) -> int:
+        """
+        Scan the plots directory and evict plots over the age and size limits
+        :return: Number of evicted plots
+        :rtype: int
+        """
+        plots_dir: Path = self.plot_cache.plots_dir
+        if not plots_dir.exists():
+            self.size = self.files = 0
+            return 0
+
+        now = self.clock()
+        # renders still in progress never take longer than the render timeout
+        temporary_max_age = 2 * settings.plot_render_timeout
+        plots: List[Tuple[float, int, Path]] = []
+        evicted = 0
+        for path in plots_dir.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.name.startswith("."):
+                if now - stat.st_mtime > temporary_max_age:
+                    self._remove(path)
+                continue
+            if path.suffix != ".png":
+                continue
+
+            last_used = max(
+                self.plot_cache.last_served.get(path.name, 0.0), stat.st_mtime
+            )
+            if now - last_used > self.max_age:
+                evicted += self._evict(path, stat.st_size)
+            else:
+                plots.append((last_used, stat.st_size, path))
+
+        size = sum(x[1] for x in plots)
+        plots.sort(key=lambda x: x[0])
+        while plots and size > self.max_bytes:
+            _, file_size, path = plots.pop(0)
+            evicted += self._evict(path, file_size)
+            size -= file_size
+
+        self.size = size
+        self.files = len(plots)
+        self._prune_last_served({path.name for _, _, path in plots})
+        return evicted
+
+    async def run(self) -> None:
+        """Evict plots every interval seconds, until cancelled"""
+        while True:
+            try:
+                evicted = await asyncio.to_thread(self.evict)
+                if evicted:
+                    logging.info(f"Evicted {evicted} plots, {self.size} bytes left")
+            except Exception as e:
+                logging.warning(f"Plot eviction failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": self.files,
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "hits": self.plot_cache.hits,
+            "misses": self.plot_cache.misses,
+        }
+
+    def _evict(self, path: Path, size: int) -> int:
+        if not self._remove(path):
+            return 0
+        self.evictions += 1
+        self.evicted_bytes += size
+        return 1
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logging.warning(f"Could not remove plot {path}: {e}")
+            return False
+        return True
+
+    def _prune_last_served(self, names: Set[str]) -> None:
+        for name in list(self.plot_cache.last_served):
+            if name not in names:
+                self.plot_cache.last_served.pop(name, None)
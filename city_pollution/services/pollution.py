@@ -1,33 +1,99 @@
+import asyncio
 import logging
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+    cast,
+)
 from abc import ABC, abstractmethod
 
-import pandas as pd
-from matplotlib import pyplot as plt
-from pandas import DataFrame
+from sqlalchemy import Row
 
 from city_pollution.config.settings import settings
+from city_pollution.db.models.pollution import POLLUTANT_COLUMNS
 from city_pollution.entities import Pollution, City
 from city_pollution.schemas.pollution import Aggregate
 from city_pollution.services.openweather_service import OpenWeatherService
 from city_pollution.services.city import CityService
+from city_pollution.services.arrow import encode_pollution_table
+from city_pollution.services.export import export_chunks
 from city_pollution.services.geocoder_service import GeocoderService
-from datetime import datetime
+from city_pollution.services.plot_cache import PlotCache, PlotQuery
+from city_pollution.services.single_flight import SingleFlight
+from city_pollution.services.plot_renderer import (
+    PlotRenderer,
+    pollution_series,
+    render_pollution_plot,
+)
+from datetime import date, datetime, timedelta, timezone
 from typing import Union
 
+from city_pollution.db.repositories.async_city_repository import AsyncCityRepository
+from city_pollution.db.repositories.async_pollution_repository import (
+    AsyncPollutionRepository,
+)
 from city_pollution.db.repositories.city_repository import CityRepository
-from city_pollution.db.repositories.pollution_repository import PollutionRepository
-from city_pollution.dependencies import Session
+from city_pollution.db.repositories.interfaces.async_city_repository import (
+    IAsyncCityRepository,
+)
+from city_pollution.db.repositories.interfaces.async_pollution_repository import (
+    IAsyncPollutionRepository,
+)
+from city_pollution.db.repositories.pollution_repository import (
+    PollutionRepository,
+    PollutionRow,
+)
+from city_pollution.db.repositories.sync_adapters import (
+    AsyncCityRepositoryAdapter,
+    AsyncPollutionRepositoryAdapter,
+)
+from city_pollution.db.session import DBSession, make_repository
 from city_pollution.schemas.city import City as CitySchema
+from city_pollution.schemas.cursor import decode_pollution_cursor, pollution_cursor
 from city_pollution.schemas.pollution import (
+    ExportFormat,
+    ImportMode,
+    PollutionChart,
     PollutionSchema,
     PollutionItemList,
-    PollutionItem,
     Dates,
+    ResponseFormat,
+    pollution_items,
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# date_trunc fields used when aggregating in the database
+AGGREGATE_PERIODS = {
+    Aggregate.MONTHLY: "month",
+    Aggregate.YEARLY: "year",
+}
+
+
+def _city_repository(db: DBSession) -> IAsyncCityRepository:
+    return make_repository(
+        db, CityRepository, AsyncCityRepository, AsyncCityRepositoryAdapter
+    )
+
+
+def _pollution_repository(db: DBSession) -> IAsyncPollutionRepository:
+    return make_repository(
+        db,
+        PollutionRepository,
+        AsyncPollutionRepository,
+        AsyncPollutionRepositoryAdapter,
+    )
+
 
 class PollutionServiceInterface(ABC):
     """Interface for pollution service operations"""
@@ -39,6 +105,13 @@ class PollutionServiceInterface(ABC):
         """Fetch pollution data by coordinates"""
         pass
 
+    @abstractmethod
+    async def fetch_pollution_by_ranges(
+        self, lat: float, lon: float, ranges: List[Tuple[int, int]], city_id: int
+    ) -> List[Pollution] | None:
+        """Fetch pollution data by coordinates for several time ranges"""
+        pass
+
     @abstractmethod
     async def pollution_to_dataframe(
         self, pollution_data_list: List[Dict[Any, Any]], city_id: int
@@ -58,49 +131,113 @@ class PollutionServiceInterface(ABC):
 
     @abstractmethod
     def generate_pollution_plot(
-        self, pollution_data: List[Pollution], city: City
+        self,
+        pollution_data: Sequence[Pollution],
+        city: City,
+        plot_filename: Optional[str] = None,
     ) -> Optional[str]:
         """Generate pollution plot"""
         pass
 
+    @abstractmethod
+    async def render_plot(self, plot_filename: str, db: DBSession) -> Optional[Path]:
+        """Render the plot for a filename issued in a pollution response"""
+        pass
+
     @abstractmethod
     async def get_pollution_data_service(
         self,
         aggregate: Aggregate,
         city_id: int,
         dates: Dates,
-        db: Session,
+        db: DBSession,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> PollutionItemList:
         """Get pollution data service"""
         pass
 
+    @abstractmethod
+    async def get_pollution_table_service(
+        self,
+        aggregate: Aggregate,
+        city_id: int,
+        dates: Dates,
+        table_format: ResponseFormat,
+        db: DBSession,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[bytes, Optional[str]]:
+        """Get pollution data as an Arrow stream or Parquet file"""
+        pass
+
+    @abstractmethod
+    async def get_pollution_chart_service(
+        self,
+        aggregate: Aggregate,
+        city_id: int,
+        dates: Dates,
+        db: DBSession,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        max_points: Optional[int] = None,
+    ) -> PollutionChart:
+        """Get pollution data as chart series"""
+        pass
+
+    @abstractmethod
+    async def get_data_version_service(self, city_id: int, db: DBSession) -> int:
+        """Get the stored data version of a city"""
+        pass
+
     @abstractmethod
     async def import_historical_pollution(
-        self, pollution_params: PollutionSchema, db: Session
+        self, pollution_params: PollutionSchema, db: DBSession
     ) -> Dict[str, str]:
         """Import historical pollution data"""
         pass
 
     @abstractmethod
     async def delete_pollution_data_service(
-        self, city_id: int, dates: Dates, db: Session
+        self, city_id: int, dates: Dates, db: DBSession
     ) -> Dict[str, Union[bool, int]]:
         """Delete pollution data"""
         pass
 
+    @abstractmethod
+    async def export_pollution_service(
+        self,
+        city_id: int,
+        dates: Dates,
+        export_format: ExportFormat,
+        db: DBSession,
+    ) -> AsyncIterator[bytes]:
+        """Stream stored pollution as NDJSON or CSV"""
+        pass
+
+    @abstractmethod
+    async def maintain_pollution_storage(self, db: DBSession) -> int:
+        """Create upcoming partitions and apply the retention period"""
+        pass
+
 
 class PollutionService(PollutionServiceInterface):
     """Service for pollution-related operations"""
 
     def __init__(
         self,
-        openweather_service: OpenWeatherService = None,
-        city_service: CityService = None,
+        openweather_service: Optional[OpenWeatherService] = None,
+        city_service: Optional[CityService] = None,
+        plot_cache: Optional[PlotCache] = None,
+        plot_renderer: Optional[PlotRenderer] = None,
     ):
         self.openweather_service = openweather_service or OpenWeatherService()
         self.city_service = city_service
+        self.plot_cache = plot_cache or PlotCache()
+        self.plot_renderer = plot_renderer or PlotRenderer()
+        self._single_flight = SingleFlight()
 
     async def _get_city_service(self) -> CityService:
         """Get city service instance, creating it if needed"""
@@ -129,13 +266,55 @@ class PollutionService(PollutionServiceInterface):
         :type: int
         :return:
         """
-        pollution_data_list = await self.openweather_service.get_pollution_data(
-            lat, lon, start, end
+        return await self.fetch_pollution_by_ranges(lat, lon, [(start, end)], city_id)
+
+    async def fetch_pollution_by_ranges(
+        self, lat: float, lon: float, ranges: List[Tuple[int, int]], city_id: int
+    ) -> List[Pollution] | None:
+        """
+        Get pollution data for a given city and coordinates for several time ranges
+        :param lat: Latitude of the location of interest
+        :type: float
+        :param lon: Longitude of the location of interest
+        :type: float
+        :param ranges: List of (start, end) timestamp pairs
+        :type: List[Tuple[int, int]]
+        :param city_id: ID of the city from our database - need to assign it to pollution entities
+        :type: int
+        :return:
+        """
+        pollution_data_list = await self.openweather_service.get_pollution_data_ranges(
+            lat, lon, ranges
         )
-        if pollution_data_list is None:
+        if not pollution_data_list:
             return None
         return await self.pollution_to_dataframe(pollution_data_list, city_id)
 
+    async def fetch_pollution_rows(
+        self, lat: float, lon: float, ranges: List[Tuple[int, int]], city_id: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get daily pollution data for several time ranges as insert parameter
+        dictionaries, skipping Pollution instantiation entirely
+        :param lat: Latitude of the location of interest
+        :type: float
+        :param lon: Longitude of the location of interest
+        :type: float
+        :param ranges: List of (start, end) timestamp pairs
+        :type: List[Tuple[int, int]]
+        :param city_id: ID of the city from our database
+        :type: int
+        :return: List of pollution rows, empty if nothing was fetched
+        :rtype: List[Dict[str, Any]]
+        """
+        pollution_data_list = await self.openweather_service.get_pollution_data_ranges(
+            lat, lon, ranges
+        )
+        if not pollution_data_list:
+            return []
+        df = self.daily_mean_dataframe(pollution_data_list, city_id)
+        return self.pandas_to_rows(df, city_id)
+
     async def pollution_to_dataframe(
         self, pollution_data_list: List[Dict[Any, Any]], city_id: int
     ) -> List[Pollution]:
@@ -151,7 +330,24 @@ class PollutionService(PollutionServiceInterface):
         :return: Pollution data
         :rtype: List[Pollution]
         """
-        df = DataFrame(pollution_data_list)
+        df = self.daily_mean_dataframe(pollution_data_list, city_id)
+        return self.pandas_to_dataclasses(df, city_id)
+
+    def daily_mean_dataframe(
+        self, pollution_data_list: List[Dict[Any, Any]], city_id: int
+    ) -> "pd.DataFrame":
+        """
+        Aggregate hourly pollution data to daily means
+        :param pollution_data_list: List with dictionaries with fetched pollution data from external service
+        :type pollution_data_list: List[Dict]
+        :param city_id: ID of the city we are interested in
+        :type city_id: int
+        :return: Dataframe with a row per date
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+
+        df = pd.DataFrame(pollution_data_list)
         df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
         # convert timestamp to new date column
         df["date"] = df["timestamp"].dt.date
@@ -179,7 +375,7 @@ class PollutionService(PollutionServiceInterface):
         df_daily_mean["date"] = pd.to_datetime(df_daily_mean["date"])
         df_daily_mean["date"] = df_daily_mean["date"].dt.date
 
-        return self.pandas_to_dataclasses(df_daily_mean, city_id)
+        return df_daily_mean
 
     def aggregated_pollutions(
         self,
@@ -200,6 +396,8 @@ class PollutionService(PollutionServiceInterface):
         if not pollution_data_list:
             return [], False
 
+        import pandas as pd
+
         df = pd.DataFrame(pollution_data_list)
         # convert date to datetime
         df["date"] = pd.to_datetime(df["date"])
@@ -228,7 +426,7 @@ class PollutionService(PollutionServiceInterface):
 
         return self.pandas_to_dataclasses(aggregated_df, city_id), gaps
 
-    def check_date_gaps(self, df: pd.DataFrame) -> bool:
+    def check_date_gaps(self, df: "pd.DataFrame") -> bool:
         """
         Check if date gaps exist in Pollution data
         :param df: DataFrame with pollution data
@@ -236,6 +434,8 @@ class PollutionService(PollutionServiceInterface):
         :return: true if date gaps exist in Pollution, else false
         :rtype: bool
         """
+        import pandas as pd
+
         df_copy = df.copy()
         df_copy["gaps"] = df_copy["date"].sort_values().diff() > pd.to_timedelta(
             "1 day"
@@ -244,120 +444,157 @@ class PollutionService(PollutionServiceInterface):
             return True
         return False
 
-    def pandas_to_dataclasses(self, df: pd.DataFrame, city_id: int) -> List[Pollution]:
+    def missing_date_ranges(
+        self, start: date, end: date, existing_dates: Set[date]
+    ) -> List[Tuple[date, date]]:
+        """
+        Find the consecutive date ranges between start and end that
+        are not yet present in the existing dates
+        :param start: Start date
+        :type start: date
+        :param end: End date
+        :type end: date
+        :param existing_dates: Dates that are already stored
+        :type existing_dates: Set[date]
+        :return: List of (start, end) date pairs, both inclusive
+        :rtype: List[Tuple[date, date]]
+        """
+        ranges: List[Tuple[date, date]] = []
+        range_start = None
+        day = start
+        while day <= end:
+            if day in existing_dates:
+                if range_start is not None:
+                    ranges.append((range_start, day - timedelta(days=1)))
+                    range_start = None
+            elif range_start is None:
+                range_start = day
+            day += timedelta(days=1)
+        if range_start is not None:
+            ranges.append((range_start, end))
+        return ranges
+
+    def date_range_to_timestamps(self, start: date, end: date) -> Tuple[int, int]:
+        """
+        Convert a date range to the UTC timestamps covering every hour of it
+        :param start: Start date
+        :type start: date
+        :param end: End date, inclusive
+        :type end: date
+        :return: Start and end timestamps
+        :rtype: Tuple[int, int]
+        """
+        start_ts = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+        end_ts = datetime.combine(
+            end + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+        )
+        return int(start_ts.timestamp()), int(end_ts.timestamp()) - 1
+
+    def pandas_to_dataclasses(
+        self, df: "pd.DataFrame", city_id: int
+    ) -> List[Pollution]:
         """
-        Exports dataframe rows to Pollution class instances
+        Exports dataframe rows to Pollution class instances. Columns are
+        converted to Python lists in one go and zipped together, which avoids
+        building a Series for every row like iterrows does
         :param df: Dataframe containing the pollution data
         :type df: pd.DataFrame
         :param city_id:
         :return: List of instantiated Pollution dataclasses
         :rtype: List[Pollution]
         """
-        pollutions = []
-        for index, row in df.iterrows():
-            pollution = Pollution(
-                co=row["co"],
-                no=row["no"],
-                no2=row["no2"],
-                o3=row["o3"],
-                so2=row["so2"],
-                pm2_5=row["pm2_5"],
-                pm10=row["pm10"],
-                nh3=row["nh3"],
-                date=row["date"],
+        columns = [df[column].tolist() for column in POLLUTANT_COLUMNS]
+        dates = df["date"].tolist()
+        return [
+            Pollution(
+                **dict(zip(POLLUTANT_COLUMNS, values)),
+                date=pollution_date,
                 city_id=city_id,
             )
-            pollutions.append(pollution)
-        return pollutions
+            for *values, pollution_date in zip(*columns, dates)
+        ]
+
+    def pandas_to_rows(self, df: "pd.DataFrame", city_id: int) -> List[Dict[str, Any]]:
+        """
+        Exports dataframe rows to insert parameter dictionaries, column by column
+        :param df: Dataframe containing the pollution data
+        :type df: pd.DataFrame
+        :param city_id:
+        :return: List of pollution rows keyed by column name
+        :rtype: List[Dict[str, Any]]
+        """
+        names = [*POLLUTANT_COLUMNS, "date", "city_id"]
+        columns = [df[column].tolist() for column in POLLUTANT_COLUMNS]
+        columns.append(df["date"].tolist())
+        columns.append([city_id] * len(df))
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def pollution_dicts(
+        self, pollution: Sequence[Union[Pollution, PollutionRow]]
+    ) -> Sequence[Any]:
+        """
+        Plain rows as dicts for pollution_items, validating fields from Row
+        attributes is several times slower. Pollution instances are passed
+        through and validated from their attributes.
+        :param pollution: Pollution rows or Pollution instances
+        :return: Dicts or Pollution instances
+        :rtype: Sequence[Any]
+        """
+        if pollution and isinstance(pollution[0], Row):
+            rows = cast(Sequence[PollutionRow], pollution)
+            keys = rows[0]._fields
+            return [dict(zip(keys, x)) for x in rows]
+        return pollution
 
     def generate_pollution_plot(
-        self, pollution_data: List[Pollution], city: City
+        self,
+        pollution_data: Sequence[Pollution],
+        city: City,
+        plot_filename: Optional[str] = None,
     ) -> Optional[str]:
         """
         Generate a plot for pollution data and return the file path
 
         :param pollution_data: List of Pollution instances
         :param city: City instance
+        :param plot_filename: Filename from PlotCache.plot_filename, a unique
+            one is generated if not given
         :return: URL to the generated plot or None if no data
         """
         if not pollution_data:
             return None
 
-        # Extract dates and pollutant values
-        dates = [p.date for p in pollution_data]
-        pollutants = {
-            "CO": [p.co for p in pollution_data],
-            "NO": [p.no for p in pollution_data],
-            "NO2": [p.no2 for p in pollution_data],
-            "O3": [p.o3 for p in pollution_data],
-            "SO2": [p.so2 for p in pollution_data],
-            "PM2.5": [p.pm2_5 for p in pollution_data],
-            "PM10": [p.pm10 for p in pollution_data],
-            "NH3": [p.nh3 for p in pollution_data],
-        }
-
-        # Create a figure with multiple subplots for each pollutant
-        fig, axes = plt.subplots(4, 2, figsize=(14, 16))
-        fig.suptitle(
-            f"Pollution Data for {city.name} ({dates[0]} to {dates[-1]})", fontsize=16
-        )
+        dates, series = pollution_series(pollution_data)
 
-        # Plot each pollutant on its own subplot
-        for i, (pollutant, values) in enumerate(pollutants.items()):
-            row, col = divmod(i, 2)
-            ax = axes[row, col]
-
-            # Filter out None values
-            valid_data = [(d, v) for d, v in zip(dates, values) if v is not None]
-            if valid_data:
-                plot_dates, plot_values = zip(*valid_data)
-                ax.plot(
-                    plot_dates, plot_values, marker="o", linestyle="-", markersize=4
-                )
-                ax.set_title(pollutant)
-                ax.set_ylabel("Concentration")
-                ax.grid(True)
-
-                # Set x-axis labels to be readable
-                if len(plot_dates) > 10:
-                    # Show fewer x-ticks if there are many dates
-                    step = max(1, len(plot_dates) // 10)
-                    ax.set_xticks(plot_dates[::step])
-
-                ax.tick_params(axis="x", rotation=45)
-            else:
-                ax.text(
-                    0.5,
-                    0.5,
-                    f"No data for {pollutant}",
-                    horizontalalignment="center",
-                    verticalalignment="center",
-                    transform=ax.transAxes,
-                )
-
-        # Adjust layout
-        plt.tight_layout(rect=(0.0, 0.0, 1.0, 0.96))
-
-        # Create a directory for storing plots if it doesn't exist yet
-        plots_dir: Path = Path(settings.temp_dir)
-        plots_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate a unique filename
-        safe_city_name = city.name.replace(" ", "_")
-        plot_filename = (
-            f"{safe_city_name}_{dates[0]}_{dates[-1]}_{uuid.uuid4().hex[:8]}.png"
-        )
-        plot_path = plots_dir / plot_filename
+        if plot_filename is None:
+            # Generate a unique filename
+            safe_city_name = city.name.replace(" ", "_")
+            plot_filename = (
+                f"{safe_city_name}_{dates[0]}_{dates[-1]}_{uuid.uuid4().hex[:8]}.png"
+            )
 
-        # Save the plot
-        plt.savefig(plot_path)
-        plt.close(fig)
+        # Save the plot and publish it under its final name in one step
+        plot_path = self.plot_cache.temporary_path(plot_filename)
+        render_pollution_plot(
+            str(plot_path),
+            self.plot_title(city, dates),
+            dates,
+            series,
+            settings.plot_max_points,
+        )
 
         # Return the URL for accessing the plot
-        return f"{settings.plots_url_base}/{plot_filename}"
+        return self.plot_cache.publish(plot_path, plot_filename)
+
+    def plot_title(self, city: City, dates: List[date]) -> str:
+        return f"Pollution Data for {city.name} ({dates[0]} to {dates[-1]})"
 
     async def pollution_response_handler(
-        self, pollution: List[Pollution], city: City, gaps: bool = False
+        self,
+        pollution: Sequence[Pollution],
+        city: City,
+        gaps: bool = False,
+        plot_filename: Optional[str] = None,
     ) -> PollutionItemList:
         start_dt = end_dt = None
         plot_url = None
@@ -365,10 +602,14 @@ class PollutionService(PollutionServiceInterface):
         if len(pollution) > 0:
             start_dt = pollution[0].date
             end_dt = pollution[-1].date
-            plot_url = self.generate_pollution_plot(pollution, city)
+            if plot_filename is not None:
+                # rendered on the first request of the URL, see render_plot
+                plot_url = self.plot_cache.url(plot_filename)
+            else:
+                plot_url = self.generate_pollution_plot(pollution, city)
 
         return PollutionItemList(
-            data=[PollutionItem.model_validate(x) for x in pollution],
+            data=pollution_items(self.pollution_dicts(pollution)),
             city=CitySchema.model_validate(city),
             start=start_dt,
             end=end_dt,
@@ -376,49 +617,325 @@ class PollutionService(PollutionServiceInterface):
             plot_url=plot_url,
         )
 
+    async def load_pollution(
+        self,
+        aggregate: Aggregate,
+        city_id: int,
+        start: date,
+        end: date,
+        db: DBSession,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> Tuple[Sequence[Pollution], bool]:
+        """
+        Load stored pollution for the city, aggregated if requested. Stored
+        rows are read as plain rows without ORM instances, they have the
+        attributes of Pollution and are only used to build responses.
+
+        :param aggregate: Aggregate of the data
+        :param city_id: Id of the city
+        :param start: Start date
+        :param end: End date
+        :param db: Database session
+        :param limit: Limit for daily data
+        :param offset: Offset for daily data
+        :param after: Keyset pagination, load daily data after this (date, id)
+        :return: Pollution list and whether there are gaps in aggregated data
+        :rtype: Tuple[Sequence[Pollution], bool]
+        """
+        pollution_repo = _pollution_repository(db)
+        if aggregate == Aggregate.DAILY:
+            pollution = await pollution_repo.get_pollution_rows(
+                start, end, city_id, limit, offset, after
+            )
+            return pollution, False
+
+        if pollution_repo.supports_sql_aggregation():
+            return await pollution_repo.get_aggregated_pollution(
+                start, end, city_id, AGGREGATE_PERIODS[aggregate]
+            )
+        pollutions = await pollution_repo.get_pollution_rows(start, end, city_id)
+        return self.aggregated_pollutions(pollutions, city_id, aggregate.value)
+
+    async def render_plot(self, plot_filename: str, db: DBSession) -> Optional[Path]:
+        """
+        Render the plot for a filename issued in a pollution response,
+        unless it's rendered already. Rendering runs in the PlotRenderer
+        process pool and concurrent requests for the same plot wait for a
+        single render.
+
+        :param plot_filename: Plot filename
+        :param db: Database session
+        :return: Path to the rendered plot or None if the filename is unknown,
+            outdated or there is no data to plot
+        :rtype: Optional[Path]
+        :raises PlotRendererBusy: If the renderer queue is full
+        :raises TimeoutError: If rendering timed out
+        """
+        query = self.plot_cache.parse_filename(plot_filename)
+        if query is None:
+            return None
+
+        return await self._single_flight.run(
+            ("plot", plot_filename),
+            lambda: self._render_plot(plot_filename, query, db),
+        )
+
+    async def _render_plot(
+        self, plot_filename: str, query: PlotQuery, db: DBSession
+    ) -> Optional[Path]:
+        path = self.plot_cache.path(plot_filename)
+        if self.plot_cache.get(plot_filename) is not None:
+            return path
+
+        city_repo = _city_repository(db)
+        city = await city_repo.get_city_by_id(query.city_id)
+        if city is None:
+            return None
+        # the plot's data changed since its URL was issued
+        if query.version != await self._data_version(query.city_id, db):
+            return None
+        pollution, _ = await self.load_pollution(
+            Aggregate(query.aggregate),
+            query.city_id,
+            query.start,
+            query.end,
+            db,
+            query.limit,
+            query.offset,
+            query.after,
+        )
+        if not pollution:
+            return None
+
+        dates, series = pollution_series(pollution)
+        tmp_path = self.plot_cache.temporary_path(plot_filename)
+        try:
+            await self.plot_renderer.render(
+                str(tmp_path),
+                self.plot_title(city, dates),
+                dates,
+                series,
+                settings.plot_max_points,
+            )
+            self.plot_cache.publish(tmp_path, plot_filename)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return path
+
     async def get_pollution_data_service(
         self,
         aggregate: Aggregate,
         city_id: int,
         dates: Dates,
-        db: Session,
+        db: DBSession,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> PollutionItemList:
+        """
+        Get stored pollution of a city. Daily data can be paged with limit
+        and either offset or cursor, the next_cursor of a full page continues
+        right after its last row, so deep pages cost as much as the first.
+        Concurrent identical calls share a single computation and its result.
+
+        :param aggregate: Aggregate of the data
+        :param city_id: Id of the city
+        :param dates: Date range
+        :param db: Database session
+        :param limit: Page size for daily data
+        :param offset: Offset for daily data
+        :param cursor: next_cursor of the previous page
+        :return: Pollution data
+        :rtype: PollutionItemList
+        """
+        return await self._single_flight.run(
+            (
+                "pollution",
+                aggregate,
+                city_id,
+                dates.start,
+                dates.end,
+                limit,
+                offset,
+                cursor,
+            ),
+            lambda: self._get_pollution_data(
+                aggregate, city_id, dates, db, limit, offset, cursor
+            ),
+        )
+
+    async def _get_pollution_data(
+        self,
+        aggregate: Aggregate,
+        city_id: int,
+        dates: Dates,
+        db: DBSession,
+        limit: Optional[int],
+        offset: Optional[int],
+        cursor: Optional[str],
     ) -> PollutionItemList:
-        city_repo = CityRepository(db)
-        city = city_repo.get_city_by_id(city_id)
+        city_repo = _city_repository(db)
+        city = await city_repo.get_city_by_id(city_id)
 
         if city and city.id:
-            pollution_repo = PollutionRepository(db)
-            if aggregate != Aggregate.DAILY:
-                pollutions = pollution_repo.get_pollution(
-                    dates.start, dates.end, city.id
-                )
-                agg_pollution, gaps = self.aggregated_pollutions(
-                    pollutions, city.id, aggregate.value
-                )
-                result = await self.pollution_response_handler(
-                    agg_pollution, city, gaps
-                )
-                return result
-
-            pollution = pollution_repo.get_pollution(
-                dates.start, dates.end, city.id, limit, offset
+            after = None
+            if cursor and aggregate == Aggregate.DAILY:
+                after = decode_pollution_cursor(cursor)
+            # read before the data, a write in between makes the plot outdated
+            # instead of labelling old data with the new version
+            version = await self._data_version(city.id, db)
+            pollution, gaps = await self.load_pollution(
+                aggregate, city.id, dates.start, dates.end, db, limit, offset, after
+            )
+            plot_filename = self.plot_cache.plot_filename(
+                city.id,
+                dates.start,
+                dates.end,
+                aggregate.value,
+                limit,
+                offset,
+                after,
+                version,
+            )
+            result = await self.pollution_response_handler(
+                pollution, city, gaps, plot_filename
             )
-            result = await self.pollution_response_handler(pollution, city)
+            if aggregate == Aggregate.DAILY and limit and len(pollution) == limit:
+                result.next_cursor = pollution_cursor(pollution[-1])
             return result
         raise ValueError("City not found")
 
+    async def get_pollution_table_service(
+        self,
+        aggregate: Aggregate,
+        city_id: int,
+        dates: Dates,
+        table_format: ResponseFormat,
+        db: DBSession,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Get stored pollution of a city as an Arrow IPC stream or a Parquet
+        file. The table is built from the columns of the stored rows, without
+        pydantic models or JSON in between, for clients loading it straight
+        into DataFrames.
+
+        :param aggregate: Aggregate of the data
+        :param city_id: Id of the city
+        :param dates: Date range
+        :param table_format: ResponseFormat.ARROW or ResponseFormat.PARQUET
+        :param db: Database session
+        :param limit: Page size for daily data
+        :param offset: Offset for daily data
+        :param cursor: Cursor of the previous page
+        :return: Encoded table and the cursor of the next page
+        :rtype: Tuple[bytes, Optional[str]]
+        :raises ImportError: If pyarrow isn't installed
+        """
+        city_repo = _city_repository(db)
+        city = await city_repo.get_city_by_id(city_id)
+
+        if city and city.id:
+            after = None
+            if cursor and aggregate == Aggregate.DAILY:
+                after = decode_pollution_cursor(cursor)
+            pollution, _ = await self.load_pollution(
+                aggregate, city.id, dates.start, dates.end, db, limit, offset, after
+            )
+            next_cursor = None
+            if aggregate == Aggregate.DAILY and limit and len(pollution) == limit:
+                next_cursor = pollution_cursor(pollution[-1])
+            # encoding is CPU bound, keep it off the event loop
+            table = await asyncio.to_thread(
+                encode_pollution_table, pollution, table_format
+            )
+            return table, next_cursor
+        raise ValueError("City not found")
+
+    async def get_pollution_chart_service(
+        self,
+        aggregate: Aggregate,
+        city_id: int,
+        dates: Dates,
+        db: DBSession,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        max_points: Optional[int] = None,
+    ) -> PollutionChart:
+        """
+        Get stored pollution as column oriented series for client side charts
+
+        :param aggregate: Aggregate of the data
+        :param city_id: Id of the city
+        :param dates: Date range
+        :param db: Database session
+        :param limit: Limit for daily data
+        :param offset: Offset for daily data
+        :param max_points: Downsample the series to at most this many dates
+        :return: Dates and one array per pollutant, missing values are None
+        :rtype: PollutionChart
+        """
+        city_repo = _city_repository(db)
+        city = await city_repo.get_city_by_id(city_id)
+
+        if city and city.id:
+            pollution, gaps = await self.load_pollution(
+                aggregate, city.id, dates.start, dates.end, db, limit, offset
+            )
+            chart_dates, series = pollution_series(pollution, max_points)
+            return PollutionChart(
+                city=CitySchema.model_validate(city),
+                dates=chart_dates,
+                gaps=gaps,
+                downsampled=len(chart_dates) < len(pollution),
+                **series,
+            )
+        raise ValueError("City not found")
+
+    async def get_data_version_service(self, city_id: int, db: DBSession) -> int:
+        """
+        Get the data version of a city, bumped in the database with every
+        write to its data, so it's the same in every process
+
+        :param city_id: Id of the city
+        :param db: Database session
+        :return: Data version
+        :rtype: int
+        :raises ValueError: If the city doesn't exist
+        """
+        city_repo = _city_repository(db)
+        if await city_repo.get_city_by_id(city_id) is None:
+            raise ValueError("City not found")
+        return await self._data_version(city_id, db)
+
+    async def _data_version(self, city_id: int, db: DBSession) -> int:
+        pollution_repo = _pollution_repository(db)
+        return await pollution_repo.get_data_version(city_id)
+
+    async def remove_plots(self, city_id: Optional[int]) -> None:
+        """
+        Remove the rendered plots of a city after its data changed, in a
+        thread to keep file system work off the event loop. Plots rendered
+        by other processes expire through PlotStoreManager.
+
+        :param city_id: Id of the city, all cities if None
+        """
+        await asyncio.to_thread(self.plot_cache.remove_plots, city_id)
+
     async def import_historical_pollution(
-        self, pollution_params: PollutionSchema, db: Session
+        self, pollution_params: PollutionSchema, db: DBSession
     ) -> Dict[str, str]:
-        city_repo = CityRepository(db)
+        city_repo = _city_repository(db)
         if pollution_params.name:
-            city = city_repo.search_city(
+            city = await city_repo.search_city(
                 pollution_params.name, pollution_params.lat, pollution_params.lon
             )
         else:
-            city = city_repo.get_city_by_lat_and_lon(
+            city = await city_repo.get_city_by_lat_and_lon(
                 pollution_params.lat, pollution_params.lon
             )
 
@@ -428,54 +945,142 @@ class PollutionService(PollutionServiceInterface):
                 pollution_params.lat, pollution_params.lon, pollution_params.name
             )
             if city_data:
-                city = city_repo.create_city(city_data)
+                city = await city_repo.create_city(city_data)
 
         if city and city.id:
-            start_ts = int(
-                datetime.combine(
-                    pollution_params.dates.start, datetime.min.time()
-                ).timestamp()
-            )
-            end_ts = int(
-                datetime.combine(
-                    pollution_params.dates.end, datetime.min.time()
-                ).timestamp()
-            )
-            pollution_repo = PollutionRepository(db)
-            pollution_repo.delete_pollution_range(
-                pollution_params.dates.start, pollution_params.dates.end, city.id
-            )
-            pollution_data = await self.fetch_pollution_by_coords(
-                pollution_params.lat,
-                pollution_params.lon,
-                start_ts,
-                end_ts,
-                city.id,
+            city_id = city.id
+            # concurrent imports of the same city and range fetch it only once
+            return await self._single_flight.run(
+                (
+                    "import",
+                    city_id,
+                    pollution_params.dates.start,
+                    pollution_params.dates.end,
+                    pollution_params.mode,
+                ),
+                lambda: self._import_city_pollution(
+                    city, city_id, pollution_params, db
+                ),
             )
+        else:
+            raise ValueError("City not found")
 
-            if pollution_data:
-                pollution_repo.create_pollution(pollution_data)
+    async def _import_city_pollution(
+        self,
+        city: City,
+        city_id: int,
+        pollution_params: PollutionSchema,
+        db: DBSession,
+    ) -> Dict[str, str]:
+        start = pollution_params.dates.start
+        end = pollution_params.dates.end
+        pollution_repo = _pollution_repository(db)
+        if pollution_params.mode == ImportMode.REPLACE:
+            # rows are upserted, so the whole range is simply overwritten
+            existing_dates: Set[date] = set()
+            date_ranges = [(start, end)]
+        else:
+            existing_dates = set(
+                await pollution_repo.get_pollution_dates(start, end, city_id)
+            )
+            date_ranges = self.missing_date_ranges(start, end, existing_dates)
+            if not date_ranges:
                 return {
-                    "success": f"pollution data imported for city {city.name} at coords {city.lat} {city.lon}"
+                    "success": f"pollution data already imported for city {city.name} at coords {city.lat} {city.lon}"
                 }
-            else:
-                raise ValueError("Pollution data not found")
+
+        pollution_rows = await self.fetch_pollution_rows(
+            pollution_params.lat,
+            pollution_params.lon,
+            [
+                self.date_range_to_timestamps(range_start, range_end)
+                for range_start, range_end in date_ranges
+            ],
+            city_id,
+        )
+        # leave rows that are already stored alone
+        pollution_rows = [
+            x
+            for x in pollution_rows
+            if start <= x["date"] <= end and x["date"] not in existing_dates
+        ]
+
+        if pollution_rows:
+            await pollution_repo.create_pollution_rows(pollution_rows)
+            await self.remove_plots(city_id)
+            return {
+                "success": f"pollution data imported for city {city.name} at coords {city.lat} {city.lon}"
+            }
         else:
-            raise ValueError("City not found")
+            raise ValueError("Pollution data not found")
 
     async def delete_pollution_data_service(
-        self, city_id: int, dates: Dates, db: Session
+        self, city_id: int, dates: Dates, db: DBSession
     ) -> Dict[str, Union[bool, int]]:
-        city_repo = CityRepository(db)
-        city = city_repo.get_city_by_id(city_id)
+        city_repo = _city_repository(db)
+        city = await city_repo.get_city_by_id(city_id)
         if city and city.id:
-            pollution_repo = PollutionRepository(db)
-            result = pollution_repo.delete_pollution_range(
+            pollution_repo = _pollution_repository(db)
+            result = await pollution_repo.delete_pollution_range(
                 dates.start, dates.end, city.id
             )
+            await self.remove_plots(city.id)
             return {"success": True, "deleted": result}
         raise ValueError("City not found")
 
+    async def export_pollution_service(
+        self,
+        city_id: int,
+        dates: Dates,
+        export_format: ExportFormat,
+        db: DBSession,
+    ) -> AsyncIterator[bytes]:
+        """
+        Export stored pollution of a city. Rows are read from a server side
+        cursor in batches of settings.pollution_export_batch_size and encoded
+        batch by batch, so memory use doesn't depend on the date range.
+
+        :param city_id: Id of the city
+        :param dates: Date range
+        :param export_format: NDJSON or CSV
+        :param db: Database session, has to stay open until the export is consumed
+        :return: Encoded chunks to stream
+        :rtype: AsyncIterator[bytes]
+        """
+        city_repo = _city_repository(db)
+        city = await city_repo.get_city_by_id(city_id)
+        if city and city.id:
+            pollution_repo = _pollution_repository(db)
+            batches = pollution_repo.stream_pollution_rows(
+                dates.start, dates.end, city.id, settings.pollution_export_batch_size
+            )
+            return export_chunks(batches, export_format)
+        raise ValueError("City not found")
+
+    async def maintain_pollution_storage(self, db: DBSession) -> int:
+        """
+        Create the pollution partitions of the current and the coming years
+        ahead of the inserts and remove the pollution older than
+        settings.pollution_retention_years
+
+        :param db: Database session
+        :return: Number of dropped partitions or deleted rows
+        :rtype: int
+        """
+        this_year = date.today().year
+        pollution_repo = _pollution_repository(db)
+        await pollution_repo.ensure_partitions(
+            list(range(this_year, this_year + settings.pollution_partitions_ahead + 1))
+        )
+        if settings.pollution_retention_years <= 0:
+            return 0
+        result = await pollution_repo.delete_pollution_before_year(
+            this_year - settings.pollution_retention_years
+        )
+        if result:
+            await self.remove_plots(None)
+        return result
+
 
 # Legacy function wrappers for backward compatibility
 async def fetch_pollution_by_coords(
@@ -502,13 +1107,13 @@ def aggregated_pollutions(
     return service.aggregated_pollutions(pollution_data_list, city_id, aggregate)
 
 
-def check_date_gaps(df: pd.DataFrame) -> bool:
+def check_date_gaps(df: "pd.DataFrame") -> bool:
     """Legacy function wrapper - deprecated, use PollutionService instead"""
     service = PollutionService()
     return service.check_date_gaps(df)
 
 
-def pandas_to_dataclasses(df: pd.DataFrame, city_id: int) -> List[Pollution]:
+def pandas_to_dataclasses(df: "pd.DataFrame", city_id: int) -> List[Pollution]:
     """Legacy function wrapper - deprecated, use PollutionService instead"""
     service = PollutionService()
     return service.pandas_to_dataclasses(df, city_id)
@@ -534,7 +1139,7 @@ async def get_pollution_data_service(
     aggregate: Aggregate,
     city_id: int,
     dates: Dates,
-    db: Session,
+    db: DBSession,
     limit: Optional[int] = None,
     offset: Optional[int] = None,
 ) -> PollutionItemList:
@@ -546,7 +1151,7 @@ async def get_pollution_data_service(
 
 
 async def import_historical_pollution(
-    pollution_params: PollutionSchema, db: Session
+    pollution_params: PollutionSchema, db: DBSession
 ) -> Dict[str, str]:
     """Legacy function wrapper - deprecated, use PollutionService instead"""
     service = PollutionService()
@@ -554,7 +1159,7 @@ async def import_historical_pollution(
 
 
 async def delete_pollution_data_service(
-    city_id: int, dates: Dates, db: Session
+    city_id: int, dates: Dates, db: DBSession
 ) -> Dict[str, Union[bool, int]]:
     """Legacy function wrapper - deprecated, use PollutionService instead"""
     service = PollutionService()
@@ -0,0 +1,76 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from city_pollution.config.settings import settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Rendered response body with its media type and extra headers"""
+
+    body: bytes
+    media_type: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of rendered pollution responses. Keys include the
+    city's data version stored in the database, so once the data changes
+    cached responses of the city can't be hit anymore in any process and
+    age out of the cache. The ETag of a response is derived from its key, so
+    it's known before (and without) running any pollution query and is the
+    same in every worker and after restarts.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = (
+            max_size if max_size is not None else settings.response_cache_size
+        )
+        self._entries: OrderedDict[Tuple[Any, ...], CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def key(self, city_id: int, version: int, *params: Any) -> Tuple[Any, ...]:
+        """
+        Cache key of a request for the data of a city
+        :param city_id: Id of the city
+        :param version: Current data version of the city
+        :param params: Request parameters the response depends on
+        :return: Key
+        :rtype: Tuple[Any, ...]
+        """
+        return (city_id, version, *params)
+
+    def etag(self, key: Tuple[Any, ...]) -> str:
+        """Strong ETag of the response for a key"""
+        return f'"{hashlib.sha256(repr(key).encode()).hexdigest()[:32]}"'
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[CachedResponse]:
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return response
+
+    def set(self, key: Tuple[Any, ...], response: CachedResponse) -> None:
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar, cast
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    call and callers arriving while it is in flight wait for it and get the
+    same result, or the same exception. Nothing is cached, a call made after
+    the previous one finished runs again.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run the call unless a call with the same key is in flight already
+
+        :param key: Key of the call, equal keys must produce equal results
+        :param call: Creates the awaitable to run
+        :return: Result of the call
+        """
+        while True:
+            task = self._calls.get(key)
+            if task is None or task.done():
+                task = asyncio.ensure_future(call())
+                self._calls[key] = task
+                task.add_done_callback(lambda done: self._forget(key, done))
+                # cancelling the first caller cancels the call, it may use
+                # resources (like a db session) owned by that caller
+                return cast(T, await task)
+
+            try:
+                # a waiting caller going away doesn't cancel the shared call
+                return cast(T, await asyncio.shield(task))
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if not task.cancelled() or (current and current.cancelling()):
+                    raise
+                # the first caller was cancelled, run the call again
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -58,3 +58,16 @@ def test_delete_city_by_id_failure(mock_city_repository_for_city_router) -> None
     response = client.delete("api/city/999/")
     assert response.status_code == 404
     assert response.json() == {"detail": "Delete failed, city not found"}
+
+
+def test_get_cities_list_cursor(mock_city_repository_for_city_router) -> None:
+    response = client.get("api/city/", params={"limit": 1})
+    assert response.status_code == 200
+    assert [x["id"] for x in response.json()] == [1]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("api/city/", params={"limit": 1, "cursor": cursor})
+    assert [x["id"] for x in response.json()] == [2]
+
+    response = client.get("api/city/", params={"cursor": "not a cursor"})
+    assert response.status_code == 422
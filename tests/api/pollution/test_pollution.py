@@ -1,9 +1,17 @@
+import csv
+import io
+import json
 from datetime import datetime, date
 from typing import List
 
+import pytest
 from pytest_mock import MockerFixture
 
+from city_pollution.dependencies import get_response_cache
 from city_pollution.entities import City, Pollution
+from city_pollution.routers.responses import negotiate_format
+from city_pollution.schemas.pollution import ResponseFormat
+from city_pollution.services.pollution import PollutionService
 from tests.config import client
 from tests.repositories.pollution import PollutionFactory
 
@@ -30,6 +38,158 @@ def test_valid_pollution_params(
     assert data["plot_url"].endswith(".png") is True
 
 
+def test_pollution_cursor_pagination(
+    mock_pollution_repository, mock_city_repository
+) -> None:
+    params = {
+        "city_id": 1,
+        "start": date(2024, 1, 1),
+        "end": date(2024, 1, 2),
+        "limit": 1,
+    }
+    first = client.get("api/pollution/", params=params).json()
+    assert len(first["data"]) == 1
+    assert first["next_cursor"]
+
+    second = client.get(
+        "api/pollution/", params={**params, "cursor": first["next_cursor"]}
+    ).json()
+    assert [x["date"] for x in second["data"]] == ["2024-01-02"]
+    assert second["plot_url"] != first["plot_url"]
+
+    response = client.get("api/pollution/", params={**params, "cursor": "abc"})
+    assert response.status_code == 422
+
+
+def test_pollution_chart_data(mock_pollution_repository, mock_city_repository) -> None:
+    params = {"city_id": 1, "start": date(2024, 1, 1), "end": date(2024, 1, 2)}
+
+    response = client.get("api/pollution/chart", params=params)
+    assert response.status_code == 200
+    data = response.json()
+    items = client.get("api/pollution/", params=params).json()["data"]
+    assert data["city"]["name"] == "San Francisco"
+    assert data["dates"] == [x["date"] for x in items]
+    assert data["co"] == [x["co"] for x in items]
+    assert data["downsampled"] is False
+
+    response = client.get("api/pollution/chart", params={**params, "city_id": 999})
+    assert response.status_code == 404
+
+
+def test_export_pollution_data(mock_pollution_repository, mock_city_repository) -> None:
+    params = {"city_id": 1, "start": date(2024, 1, 1), "end": date(2024, 1, 2)}
+    items = client.get("api/pollution/", params=params).json()["data"]
+
+    response = client.get("api/pollution/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(x) for x in response.text.splitlines()]
+    assert [(x["date"], x["co"]) for x in lines] == [
+        (x["date"], x["co"]) for x in items
+    ]
+
+    response = client.get("api/pollution/export", params={**params, "format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(x["date"], float(x["co"])) for x in rows] == [
+        (x["date"], x["co"]) for x in items
+    ]
+
+    response = client.get("api/pollution/export", params={**params, "city_id": 999})
+    assert response.status_code == 404
+
+
+def test_negotiate_format() -> None:
+    arrow = "application/vnd.apache.arrow.stream"
+
+    assert negotiate_format(None, None) == ResponseFormat.JSON
+    assert negotiate_format(None, "application/json, */*") == ResponseFormat.JSON
+    assert negotiate_format(None, f"{arrow};q=0.9, */*") == ResponseFormat.ARROW
+    assert negotiate_format(ResponseFormat.PARQUET, arrow) == ResponseFormat.PARQUET
+
+
+def test_pollution_arrow_response(
+    mock_pollution_repository, mock_city_repository
+) -> None:
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    params = {"city_id": 1, "start": date(2024, 1, 1), "end": date(2024, 1, 2)}
+    items = client.get("api/pollution/", params=params).json()["data"]
+
+    response = client.get(
+        "api/pollution/",
+        params=params,
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("co").to_pylist() == [x["co"] for x in items]
+
+    response = client.get("api/pollution/", params={**params, "format": "parquet"})
+    table = pq.read_table(io.BytesIO(response.content))
+    assert [str(x) for x in table.column("date").to_pylist()] == [
+        x["date"] for x in items
+    ]
+
+
+def test_pollution_etag_until_data_changes(
+    mock_pollution_repository, mock_city_repository, mocker: MockerFixture
+) -> None:
+    params = {"city_id": 1, "start": date(2024, 1, 1), "end": date(2024, 1, 2)}
+    first = client.get("api/pollution/", params=params)
+    etag = first.headers["etag"]
+
+    load = mocker.spy(PollutionService, "load_pollution")
+    response = client.get("api/pollution/", params=params)
+    assert response.headers["etag"] == etag
+    assert response.content == first.content
+    response = client.get(
+        "api/pollution/", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert "Accept" in response.headers["vary"]
+    # both answered from the response cache without a query
+    assert load.call_count == 0
+
+    # versions are stored, another worker or a restart keeps the ETag
+    get_response_cache().clear()
+    response = client.get(
+        "api/pollution/", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    client.delete("api/pollution/", params=params)
+    response = client.get(
+        "api/pollution/", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    # unknown cities have no data version to tag
+    response = client.get(
+        "api/pollution/",
+        params={**params, "city_id": 999},
+        headers={"If-None-Match": "*"},
+    )
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+
+def test_pollution_plot_rendered_on_first_fetch(
+    mock_pollution_repository, mock_city_repository
+) -> None:
+    params = {"city_id": 1, "start": date(2024, 1, 1), "end": date(2024, 1, 2)}
+    plot_url = client.get("api/pollution/", params=params).json()["plot_url"]
+
+    response = client.get(plot_url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert client.get(plot_url).content == response.content
+
+    assert client.get(plot_url.replace(".png", "0.png")).status_code == 404
+
+
 def test_valid_pollution_params_no_data(
     mock_pollution_repository, mock_city_repository, mocker: MockerFixture
 ) -> None:
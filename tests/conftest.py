@@ -1,9 +1,14 @@
 import matplotlib
 import pytest
 
+from city_pollution.dependencies import get_response_cache
 from tests.config import override_get_db, app, get_db, FakeDB
 
-pytest_plugins = ["tests.api.city.fixtures", "tests.api.pollution.fixtures"]
+pytest_plugins = [
+    "tests.api.city.fixtures",
+    "tests.api.pollution.fixtures",
+    "tests.repositories.fixtures",
+]
 
 
 matplotlib.use("Agg")
@@ -15,3 +20,10 @@ def fake_repo() -> None:
     fake_db = override_get_db(fake_db)
     app.dependency_overrides[get_db] = fake_db
     yield
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache() -> None:
+    # cached responses of one test's fake data must not leak into another
+    get_response_cache().clear()
+    yield
@@ -1,9 +1,10 @@
 import random
 from datetime import datetime
-from typing import ClassVar, Dict, Any, List
+from typing import ClassVar, Dict, Any, List, Optional
 
 from city_pollution.db.repositories.interfaces.city_repository import ICityRepository
 from city_pollution.entities import City
+from tests.repositories.pollution import stored_data_versions
 
 
 class CityFactory:
@@ -61,7 +62,7 @@ class CityRepositoryPrepopulated(ICityRepository):
     def create_city(self, city: City) -> City:
         db_city = self.search_city(city_name=city.name, lat=city.lat, lon=city.lon)
         if db_city:
-            return city
+            return db_city
 
         city.id = len(self.cities) + 1
         self.cities.append(city)
@@ -70,10 +71,16 @@ class CityRepositoryPrepopulated(ICityRepository):
     def get_city_by_lat_and_lon(
         self, lat: float, lon: float, tolerance: float = 0.01
     ) -> City | None:
-        for city in self.cities:
-            if abs(city.lat - lat) <= tolerance and abs(city.lon - lon) <= tolerance:
-                return city
-        return None
+        nearby = [
+            city
+            for city in self.cities
+            if abs(city.lat - lat) <= tolerance and abs(city.lon - lon) <= tolerance
+        ]
+        return min(
+            nearby,
+            key=lambda city: (city.lat - lat) ** 2 + (city.lon - lon) ** 2,
+            default=None,
+        )
 
     def search_city(self, city_name: str, lat: float, lon: float) -> City | None:
         for city in self.cities:
@@ -97,20 +104,25 @@ class CityRepositoryPrepopulated(ICityRepository):
                 city.country = city_data["country"]
                 city.county_code = city_data["county"]
                 city.time_updated = datetime.now().date()
+                stored_data_versions[city_id] += 1
                 break
 
     def delete_city(self, city_id: int) -> bool:
         for city in self.cities:
             if city.id == city_id:
                 self.cities.remove(city)
+                stored_data_versions[city_id] += 1
                 return True
         return False
 
-    def get_cities(self, limit: int, offset: int) -> List[City]:
+    def get_cities(
+        self, limit: int, offset: int, after_id: Optional[int] = None
+    ) -> List[City]:
+        cities = sorted(self.cities, key=lambda x: x.id)
+        if after_id is not None:
+            cities = [x for x in cities if x.id > after_id]
         if offset:
-            cities = self.cities[offset:]
-        else:
-            cities = self.cities
+            cities = cities[offset:]
 
         if limit is not None:
             cities = cities[:limit]
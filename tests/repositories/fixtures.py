@@ -0,0 +1,44 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from city_pollution.db.models.base import mapper_registry
+from city_pollution.entities import City
+
+
+def make_city() -> City:
+    return City(
+        id=1,
+        name="San Francisco",
+        state="California",
+        country="United States",
+        lat=40.53,
+        lon=-74.56,
+    )
+
+
+@pytest.fixture
+def sqlite_db():
+    # the async adapter fetches streamed export batches in a worker thread,
+    # every other sync repository call runs on the event loop thread
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    mapper_registry.metadata.create_all(engine)
+    with sessionmaker(bind=engine, expire_on_commit=False)() as db:
+        db.add(make_city())
+        db.commit()
+        yield db
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_sqlite_db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(mapper_registry.metadata.create_all)
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+        db.add(make_city())
+        await db.commit()
+        yield db
+    await engine.dispose()
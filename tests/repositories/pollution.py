@@ -1,12 +1,18 @@
 import random
+from collections import defaultdict
 from datetime import date
-from typing import ClassVar, List, Optional, Dict, Any
+from typing import ClassVar, Iterator, List, Optional, Dict, Any, Tuple
 
+from city_pollution.db.data_version import ALL_CITIES
 from city_pollution.db.repositories.interfaces.pollution_repository import (
     IPollutionRepository,
 )
 from city_pollution.entities import Pollution
 
+# Stored data versions of the fake repositories, shared by all their
+# instances like the data_version table
+stored_data_versions: Dict[int, int] = defaultdict(int)
+
 
 class PollutionFactory:
     _id: ClassVar[int] = 0
@@ -81,12 +87,18 @@ class PollutionRepositoryPrepopulated((IPollutionRepository)):
         city_id: int,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
     ) -> List[Pollution]:
-        result = [
-            x
-            for x in self.pollutions
-            if x.city_id == city_id and (start <= x.date <= end)
-        ]
+        result = sorted(
+            (
+                x
+                for x in self.pollutions
+                if x.city_id == city_id and (start <= x.date <= end)
+            ),
+            key=lambda x: (x.date, x.id),
+        )
+        if after is not None:
+            result = [x for x in result if (x.date, x.id) > after]
 
         if offset:
             result = result[offset:]
@@ -96,8 +108,48 @@ class PollutionRepositoryPrepopulated((IPollutionRepository)):
 
         return result
 
+    def get_pollution_rows(
+        self,
+        start: date,
+        end: date,
+        city_id: int,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Any]:
+        return self.get_pollution(start, end, city_id, limit, offset, after)
+
+    def stream_pollution_rows(
+        self, start: date, end: date, city_id: int, batch_size: int
+    ) -> Iterator[List[Any]]:
+        rows = self.get_pollution(start, end, city_id)
+        for i in range(0, len(rows), batch_size):
+            yield rows[i : i + batch_size]
+
+    def supports_sql_aggregation(self) -> bool:
+        return False
+
+    def get_aggregated_pollution(
+        self, start: date, end: date, city_id: int, period: str
+    ) -> Tuple[List[Pollution], bool]:
+        raise NotImplementedError
+
+    def get_pollution_dates(self, start: date, end: date, city_id: int) -> List[date]:
+        return sorted(
+            {
+                x.date
+                for x in self.pollutions
+                if x.city_id == city_id and (start <= x.date <= end)
+            }
+        )
+
     def create_pollution(self, pollution_data: List[Pollution]) -> None:
         self.pollutions.extend(pollution_data)
+        for city_id in {x.city_id for x in pollution_data}:
+            stored_data_versions[city_id] += 1
+
+    def create_pollution_rows(self, pollution_rows: List[Dict[str, Any]]) -> None:
+        self.create_pollution([Pollution(**row) for row in pollution_rows])
 
     def delete_pollution_range(self, start: date, end: date, city_id: int):
         temp = []
@@ -108,14 +160,29 @@ class PollutionRepositoryPrepopulated((IPollutionRepository)):
             ) or city_id != pollution.city_id:
                 temp.append(pollution)
         self.pollutions = temp
+        stored_data_versions[city_id] += 1
         end_len = len(self.pollutions)
         return begin_len - end_len
 
-    def get_pollution_by_id(self, pollution_id: int) -> Any:
+    def ensure_partitions(self, years: List[int]) -> None:
+        pass
+
+    def delete_pollution_before_year(self, year: int) -> int:
+        begin_len = len(self.pollutions)
+        self.pollutions = [x for x in self.pollutions if x.date.year >= year]
+        stored_data_versions[ALL_CITIES] += 1
+        return begin_len - len(self.pollutions)
+
+    def get_pollution_by_id(
+        self, pollution_id: int, pollution_date: Optional[date] = None
+    ) -> Any:
         return self.db.query(Pollution).get(pollution_id)
 
     def update_pollution(
-        self, pollution_id: int, pollution_data: Dict[Any, Any]
+        self,
+        pollution_id: int,
+        pollution_data: Dict[Any, Any],
+        pollution_date: Optional[date] = None,
     ) -> Optional[Pollution]:
         for pollution in self.pollutions:
             if pollution.id == pollution_data.get(pollution.id):
@@ -129,3 +196,6 @@ class PollutionRepositoryPrepopulated((IPollutionRepository)):
                 pollution.nh3 = pollution_data.get("nh3")
                 return pollution
         return None
+
+    def get_data_version(self, city_id: int) -> int:
+        return stored_data_versions[city_id] + stored_data_versions[ALL_CITIES]
@@ -0,0 +1,44 @@
+import pytest
+
+from city_pollution.db.repositories.async_city_repository import AsyncCityRepository
+from city_pollution.db.repositories.city_repository import CityRepository
+from city_pollution.entities import City
+from tests.repositories.fixtures import make_city
+
+
+def test_get_city_by_lat_and_lon_returns_nearest(sqlite_db):
+    repo = CityRepository(sqlite_db)
+    nearer = City(id=2, name="Nearer", state="", country="", lat=40.536, lon=-74.566)
+    sqlite_db.add(nearer)
+    sqlite_db.commit()
+
+    assert repo.get_city_by_lat_and_lon(40.537, -74.567) is nearer
+    assert repo.get_city_by_lat_and_lon(40.529, -74.559).name == "San Francisco"
+    assert repo.get_city_by_lat_and_lon(41.0, -74.56) is None
+
+
+def test_create_city_keeps_existing_city(sqlite_db):
+    repo = CityRepository(sqlite_db)
+
+    city = repo.create_city(
+        City(id=None, name="Nearer", state="", country="", lat=40.536, lon=-74.566)
+    )
+    # a concurrent import creating the same city gets the stored one
+    again = repo.create_city(
+        City(id=None, name="Nearer", state="", country="", lat=40.536, lon=-74.566)
+    )
+    assert city.id == again.id == 2
+    assert repo.create_city(make_city()).id == 1
+
+
+@pytest.mark.asyncio
+async def test_async_city_repository(async_sqlite_db):
+    repo = AsyncCityRepository(async_sqlite_db)
+
+    city = await repo.get_city_by_lat_and_lon(40.535, -74.565)
+    assert city.name == "San Francisco"
+    assert await repo.search_city("San Francisco", 40.53, -74.56) is city
+    assert (await repo.create_city(make_city())).id == 1
+    assert [x.id for x in await repo.get_cities()] == [1]
+    assert await repo.delete_city(1) is True
+    assert await repo.get_city_by_id(1) is None
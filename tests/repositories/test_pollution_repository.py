@@ -0,0 +1,191 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from city_pollution.db.partitions import create_partition_statement
+from city_pollution.db.repositories.async_pollution_repository import (
+    AsyncPollutionRepository,
+)
+from city_pollution.db.repositories.pollution_repository import (
+    PollutionRepository,
+    aggregated_pollution_statement,
+    has_date_gaps,
+)
+from city_pollution.db.repositories.sync_adapters import (
+    AsyncPollutionRepositoryAdapter,
+)
+from city_pollution.db.session import make_repository
+from city_pollution.entities import Pollution
+from city_pollution.schemas.pollution import PollutionItem, pollution_items
+from city_pollution.services.pollution import PollutionService
+from tests.repositories.pollution import PollutionFactory
+
+
+def test_create_pollution_upserts(sqlite_db):
+    repo = PollutionRepository(sqlite_db)
+    days = [date(2024, 1, 1), date(2024, 1, 2)]
+
+    repo.create_pollution([PollutionFactory.create(d, 1) for d in days])
+    reimported = [PollutionFactory.create(d, 1) for d in days]
+    repo.create_pollution(reimported)
+
+    stored = repo.get_pollution(date(2024, 1, 1), date(2024, 1, 2), 1)
+    assert len(stored) == 2
+    assert [x.co for x in stored] == [x.co for x in reimported]
+    assert repo.get_pollution_dates(date(2024, 1, 1), date(2024, 1, 31), 1) == days
+
+
+def test_aggregated_pollution_statement():
+    statement = aggregated_pollution_statement(
+        date(2014, 1, 1), date(2024, 1, 1), 1, "year"
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "date_trunc" in sql
+    assert "GROUP BY" in sql
+    assert "avg(pollution.pm2_5)" in sql
+
+
+def test_has_date_gaps():
+    assert has_date_gaps(date(2024, 1, 1), date(2024, 1, 3), 3) is False
+    assert has_date_gaps(date(2024, 1, 1), date(2024, 1, 3), 2) is True
+    assert has_date_gaps(None, None, 0) is False
+
+
+@pytest.mark.asyncio
+async def test_async_pollution_repository(async_sqlite_db):
+    repo = AsyncPollutionRepository(async_sqlite_db)
+    days = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)]
+
+    await repo.create_pollution([PollutionFactory.create(d, 1) for d in days])
+    await repo.create_pollution([PollutionFactory.create(d, 1) for d in days])
+
+    stored = await repo.get_pollution(date(2024, 1, 1), date(2024, 1, 31), 1)
+    assert [x.date for x in stored] == days
+    page = await repo.get_pollution(date(2024, 1, 1), date(2024, 1, 31), 1, 1, 1)
+    assert [x.date for x in page] == days[1:2]
+    assert await repo.get_pollution_dates(date(2024, 1, 2), date(2024, 1, 31), 1) == (
+        days[1:]
+    )
+    batches = [
+        [x.date for x in batch]
+        async for batch in repo.stream_pollution_rows(
+            date(2024, 1, 1), date(2024, 1, 31), 1, 2
+        )
+    ]
+    assert batches == [days[:2], days[2:]]
+    assert await repo.delete_pollution_range(date(2024, 1, 2), date(2024, 1, 2), 1) == 1
+
+
+def test_get_pollution_keyset_pagination(sqlite_db):
+    repo = PollutionRepository(sqlite_db)
+    repo.create_pollution(
+        [PollutionFactory.create(date(2024, 1, day), 1) for day in range(1, 8)]
+    )
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+
+    pages, after = [], None
+    while True:
+        page = repo.get_pollution(start, end, 1, limit=3, after=after)
+        if not page:
+            break
+        pages.append([x.date for x in page])
+        after = (page[-1].date, page[-1].id)
+
+    by_offset = [
+        [x.date for x in repo.get_pollution(start, end, 1, limit=3, offset=offset)]
+        for offset in (0, 3, 6)
+    ]
+    assert pages == by_offset
+
+
+def test_create_partition_statement():
+    sql = str(create_partition_statement(2024))
+
+    assert "pollution_y2024 PARTITION OF pollution" in sql
+    assert "FROM ('2024-01-01') TO ('2025-01-01')" in sql
+
+
+def test_delete_pollution_before_year_without_partitions(sqlite_db):
+    repo = PollutionRepository(sqlite_db)
+    days = [date(2022, 12, 31), date(2023, 1, 1), date(2024, 6, 1)]
+    repo.create_pollution([PollutionFactory.create(d, 1) for d in days])
+
+    # nothing to create, pollution isn't partitioned outside of PostgreSQL
+    repo.ensure_partitions([2025])
+    assert repo.delete_pollution_before_year(2023) == 1
+    assert repo.get_pollution_dates(date(2020, 1, 1), date(2025, 1, 1), 1) == days[1:]
+
+
+def test_data_versions_are_bumped_with_writes(sqlite_db):
+    repo = PollutionRepository(sqlite_db)
+    assert repo.get_data_version(1) == 0
+
+    repo.create_pollution([PollutionFactory.create(date(2023, 1, 1), 1)])
+    repo.create_pollution([PollutionFactory.create(date(2024, 1, 1), 1)])
+    assert repo.get_data_version(1) == 2
+    assert repo.get_data_version(2) == 0
+
+    repo.delete_pollution_range(date(2024, 1, 1), date(2024, 1, 1), 1)
+    assert repo.get_data_version(1) == 3
+    # removing old data of all cities bumps every city
+    repo.delete_pollution_before_year(2024)
+    assert repo.get_data_version(1) == 4
+    assert repo.get_data_version(2) == 1
+
+
+def test_get_pollution_rows_skips_orm_instances(sqlite_db):
+    repo = PollutionRepository(sqlite_db)
+    repo.create_pollution(
+        [PollutionFactory.create(date(2024, 1, day), 1) for day in range(1, 5)]
+    )
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+
+    rows = repo.get_pollution_rows(start, end, 1, limit=2, after=(date(2024, 1, 1), 0))
+    entities = repo.get_pollution(start, end, 1, limit=2, after=(date(2024, 1, 1), 0))
+
+    assert not any(isinstance(x, Pollution) for x in rows)
+    assert [(x.id, x.date, x.co) for x in rows] == [
+        (x.id, x.date, x.co) for x in entities
+    ]
+    assert pollution_items(PollutionService().pollution_dicts(rows)) == [
+        PollutionItem.model_validate(x) for x in entities
+    ]
+
+
+def test_stream_pollution_rows_in_batches(sqlite_db):
+    repo = PollutionRepository(sqlite_db)
+    days = [date(2024, 1, day) for day in range(1, 6)]
+    repo.create_pollution([PollutionFactory.create(d, 1) for d in days])
+
+    batches = list(
+        repo.stream_pollution_rows(date(2024, 1, 1), date(2024, 1, 31), 1, 2)
+    )
+
+    assert [len(x) for x in batches] == [2, 2, 1]
+    assert [x.date for batch in batches for x in batch] == days
+
+
+@pytest.mark.asyncio
+async def test_sync_pollution_repository_adapter(sqlite_db):
+    repo = make_repository(
+        sqlite_db,
+        PollutionRepository,
+        AsyncPollutionRepository,
+        AsyncPollutionRepositoryAdapter,
+    )
+    assert isinstance(repo, AsyncPollutionRepositoryAdapter)
+    days = [date(2024, 1, day) for day in range(1, 6)]
+    await repo.create_pollution([PollutionFactory.create(d, 1) for d in days])
+
+    assert (
+        await repo.get_pollution_dates(date(2024, 1, 1), date(2024, 1, 31), 1) == days
+    )
+    batches = [
+        batch
+        async for batch in repo.stream_pollution_rows(
+            date(2024, 1, 1), date(2024, 1, 31), 1, 2
+        )
+    ]
+    assert [len(x) for x in batches] == [2, 2, 1]
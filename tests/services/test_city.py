@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from city_pollution.services.city import CityService
+from city_pollution.services.geocoder_service import (
+    GeocoderService,
+    GeocoderServiceInterface,
+)
+
+
+def make_result(name, lat, lon):
+    return {
+        "components": {"_type": "city", "city": name, "country": "Germany"},
+        "geometry": {"lat": lat, "lng": lon},
+    }
+
+
+class SlowGeocoderService(GeocoderServiceInterface):
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _call(self, result):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return result
+
+    async def get_reverse_geocode(self, lat, lon):
+        return await self._call([make_result("Hanover", lat, lon)])
+
+    async def get_city_by_name(self, name):
+        return await self._call([make_result(name, 52.37, 9.73)])
+
+
+@pytest.mark.asyncio
+async def test_get_city_geocodes_concurrently():
+    geocoder_service = SlowGeocoderService()
+    service = CityService(geocoder_service)
+
+    city = await service.get_city(52.37, 9.73, "Hannover")
+
+    assert geocoder_service.max_in_flight == 2
+    # results of the name lookup take precedence over the reverse lookup
+    assert city.name == "Hannover"
+
+
+@pytest.mark.asyncio
+async def test_geocoder_service_offloads_sync_geocoder():
+    class SyncGeocoder:
+        session = None
+
+        def geocode(self, name):
+            return [name]
+
+    service = GeocoderService(SyncGeocoder())
+    assert await service.get_city_by_name("Hannover") == ["Hannover"]
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from city_pollution.services.downsampling import (
+    downsample_points,
+    downsample_series,
+    lttb_indices,
+)
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 100.0
+
+    indices = lttb_indices(x, y, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 500 in indices
+    assert np.all(np.diff(indices) > 0)
+    assert len(lttb_indices(x[:10], y[:10], 50)) == 10
+
+
+def test_downsample_series_keeps_common_dates_and_nulls():
+    dates = [date(2020, 1, 1) + timedelta(days=i) for i in range(1000)]
+    series = {
+        "co": [float(i % 7) for i in range(1000)],
+        "no": [None if i % 2 else float(i) for i in range(1000)],
+        "o3": [None] * 1000,
+    }
+
+    sampled_dates, sampled = downsample_series(dates, series, 100)
+
+    assert 50 <= len(sampled_dates) <= 100
+    assert sampled_dates == sorted(sampled_dates)
+    assert sampled_dates[0] == dates[0] and sampled_dates[-1] == dates[-1]
+    assert all(len(values) == len(sampled_dates) for values in sampled.values())
+    assert sampled["o3"] == [None] * len(sampled_dates)
+    # values stay aligned with their dates
+    for d, value in zip(sampled_dates, sampled["no"]):
+        i = (d - dates[0]).days
+        assert value == series["no"][i]
+    assert downsample_series(dates[:10], series, 100)[0] == dates[:10]
+
+
+def test_downsample_points_drops_nulls():
+    dates = [date(2020, 1, 1) + timedelta(days=i) for i in range(1000)]
+    values = [None if i % 3 == 0 else float(i) for i in range(1000)]
+
+    sampled_dates, sampled_values = downsample_points(dates, values, 100)
+
+    assert len(sampled_dates) == len(sampled_values) == 100
+    assert None not in sampled_values
+    assert downsample_points(dates[:5], values[:5], 100) == (
+        [dates[1], dates[2], dates[4]],
+        [1.0, 2.0, 4.0],
+    )
+
+
+def test_downsample_series_budget_is_shared_by_all_series():
+    days = 5000
+    dates = [date(2010, 1, 1) + timedelta(days=i) for i in range(days)]
+    rng = np.random.default_rng(0)
+    series = {
+        name: rng.normal(50, 10, days).tolist()
+        for name in ("co", "no", "no2", "o3", "so2", "pm2_5", "pm10", "nh3")
+    }
+
+    for max_points in (100, 500, 10):
+        sampled_dates, _ = downsample_series(dates, series, max_points)
+        assert max_points // 2 <= len(sampled_dates) <= max_points
+        assert sampled_dates[0] == dates[0]
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from city_pollution.db.models.model import Base
+from city_pollution.services.geocoder_cache import CachedGeocoderService, GeocoderCache
+from city_pollution.services.geocoder_service import GeocoderServiceInterface
+
+
+class CountingGeocoderService(GeocoderServiceInterface):
+    def __init__(self):
+        self.calls = []
+
+    async def get_reverse_geocode(self, lat, lon):
+        self.calls.append(("reverse", lat, lon))
+        return [{"components": {"_type": "city", "city": "Hanover"}}]
+
+    async def get_city_by_name(self, name):
+        self.calls.append(("forward", name))
+        return [] if name.startswith("Nowhere") else [{"components": {}}]
+
+
+@pytest.mark.asyncio
+async def test_cached_geocoder_service():
+    now = [1000.0]
+    inner = CountingGeocoderService()
+    cache = GeocoderCache(
+        max_size=10, ttl=100, negative_ttl=10, precision=3, clock=lambda: now[0]
+    )
+    service = CachedGeocoderService(inner, cache)
+
+    await service.get_reverse_geocode(52.38771, 9.73341)
+    await service.get_reverse_geocode(52.38769, 9.73339)
+    await service.get_city_by_name("New  York")
+    await service.get_city_by_name(" new york ")
+    assert await service.get_city_by_name("Nowhere") == []
+    assert await service.get_city_by_name("Nowhere") == []
+
+    assert len(inner.calls) == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["negative_hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+    # negative entries expire sooner than positive ones
+    now[0] += 50
+    await service.get_city_by_name("Nowhere")
+    await service.get_city_by_name("new york")
+    assert len(inner.calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_geocoder_cache_lru_and_persistence():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    cache = GeocoderCache(max_size=1, ttl=100, session_factory=session_factory)
+    await cache.set("a", [1])
+    await cache.set("b", [2])
+    assert cache.stats()["size"] == 1
+
+    # "a" was evicted from memory but is still in the persistent table
+    assert await cache.get("a") == [1]
+    assert cache.stats()["persistent_hits"] == 1
+
+    restarted = GeocoderCache(max_size=1, ttl=100, session_factory=session_factory)
+    assert await restarted.get("b") == [2]
+    engine.dispose()
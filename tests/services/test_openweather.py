@@ -0,0 +1,158 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from city_pollution.config.settings import settings
+from city_pollution.services.openweather_service import (
+    OpenWeatherService,
+    SECONDS_IN_DAY,
+    split_into_windows,
+)
+
+
+def make_payload(*timestamps: int) -> dict:
+    return {
+        "list": [
+            {
+                "dt": ts,
+                "components": {
+                    "co": 100.0,
+                    "no": 0.0,
+                    "no2": 10.0,
+                    "o3": 20.0,
+                    "so2": 5.0,
+                    "pm2_5": 22.0,
+                    "pm10": 1.0,
+                    "nh3": 0.0,
+                },
+            }
+            for ts in timestamps
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_pollution_data_reuses_client():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=make_payload(1712264400, 1712268000))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service = OpenWeatherService(
+        api_key="key", base_url="https://example.com/air", client=client
+    )
+
+    first = await service.get_pollution_data(1.0, 2.0, 1712264400, 1712268000)
+    second = await service.get_pollution_data(1.0, 2.0, 1712264400, 1712268000)
+
+    assert len(first) == len(second) == 2
+    assert first[0]["timestamp"] == 1712264400
+    assert service._get_client() is client
+    assert requests[0].url.params["appid"] == "key"
+    assert requests[0].url.params["start"] == "1712264400"
+
+    await service.aclose()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_get_pollution_data_error():
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(401))
+    )
+    service = OpenWeatherService(
+        api_key="key", base_url="https://example.com/air", client=client
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        await service.get_pollution_data(1.0, 2.0, 0, 3600)
+    assert exc.value.status_code == 401
+
+    await service.aclose()
+
+
+def test_split_into_windows():
+    assert split_into_windows(0, 100, 40) == [(0, 40), (40, 80), (80, 100)]
+    assert split_into_windows(0, 40, 40) == [(0, 40)]
+    assert split_into_windows(10, 10, 40) == [(10, 10)]
+    with pytest.raises(ValueError):
+        split_into_windows(0, 100, 0)
+
+
+@pytest.mark.asyncio
+async def test_get_pollution_data_windowed(mocker):
+    mocker.patch.object(settings, "openweather_window_days", 1)
+    mocker.patch.object(settings, "openweather_retry_backoff", 0)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        start = int(request.url.params["start"])
+        end = int(request.url.params["end"])
+        calls.append(start)
+        # the second window fails once and must be retried on its own
+        if start == SECONDS_IN_DAY and calls.count(start) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json=make_payload(start, end))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service = OpenWeatherService(
+        api_key="key", base_url="https://example.com/air", client=client
+    )
+
+    result = await service.get_pollution_data_windowed(1.0, 2.0, 0, 3 * SECONDS_IN_DAY)
+
+    assert [x["timestamp"] for x in result] == [
+        0,
+        SECONDS_IN_DAY,
+        2 * SECONDS_IN_DAY,
+        3 * SECONDS_IN_DAY,
+    ]
+    assert sorted(calls) == [0, SECONDS_IN_DAY, SECONDS_IN_DAY, 2 * SECONDS_IN_DAY]
+
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_pollution_data_windowed_cancels_on_failure(mocker):
+    mocker.patch.object(settings, "openweather_window_days", 1)
+    mocker.patch.object(settings, "openweather_max_retries", 0)
+    cancelled = []
+
+    async def fetch(lat, lon, start, end):
+        if start == 0:
+            raise HTTPException(status_code=401)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(start)
+            raise
+        return []
+
+    service = OpenWeatherService(api_key="key", base_url="https://example.com/air")
+    mocker.patch.object(service, "_request_pollution_data", side_effect=fetch)
+
+    with pytest.raises(HTTPException) as exc:
+        await service.get_pollution_data_windowed(1.0, 2.0, 0, 3 * SECONDS_IN_DAY)
+    assert exc.value.status_code == 401
+    assert sorted(cancelled) == [SECONDS_IN_DAY, 2 * SECONDS_IN_DAY]
+
+
+@pytest.mark.asyncio
+async def test_get_pollution_data_not_found():
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json=make_payload())
+        )
+    )
+    service = OpenWeatherService(
+        api_key="key", base_url="https://example.com/air", client=client
+    )
+
+    with pytest.raises(ValueError, match="Pollution data not found"):
+        await service.get_pollution_data(1.0, 2.0, 0, 3600)
+
+    await service.aclose()
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from city_pollution.services.plot_renderer import (
+    PlotRenderer,
+    PlotRendererBusy,
+    pollution_series,
+)
+from tests.repositories.pollution import PollutionFactory
+
+
+def make_series():
+    return pollution_series(
+        [
+            PollutionFactory.create(date(2024, 1, 1), 1),
+            PollutionFactory.create(date(2024, 1, 2), 1),
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_plot_renderer_renders_in_process_pool(tmp_path):
+    renderer = PlotRenderer(max_workers=1, timeout=60, max_queue=2)
+    dates, series = make_series()
+    path = tmp_path / "plot.png"
+
+    await renderer.render(str(path), "title", dates, series)
+
+    assert path.read_bytes().startswith(b"\x89PNG")
+    assert renderer.pending == 0
+    renderer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_plot_renderer_limits(tmp_path):
+    dates, series = make_series()
+
+    busy = PlotRenderer(max_workers=1, timeout=60, max_queue=0)
+    with pytest.raises(PlotRendererBusy):
+        await busy.render(str(tmp_path / "busy.png"), "title", dates, series)
+
+    slow = PlotRenderer(max_workers=1, timeout=0.001, max_queue=1)
+    with pytest.raises(TimeoutError):
+        await slow.render(str(tmp_path / "slow.png"), "title", dates, series)
+    # the timed out render keeps its slot until the worker is done with it
+    assert slow.pending == 1
+    with pytest.raises(PlotRendererBusy):
+        await slow.render(str(tmp_path / "slower.png"), "title", dates, series)
+    for _ in range(600):
+        if slow.pending == 0:
+            break
+        await asyncio.sleep(0.1)
+    assert slow.pending == 0
+    assert (tmp_path / "slow.png").exists()
+    slow.shutdown()
@@ -0,0 +1,40 @@
+import os
+
+from city_pollution.services.plot_cache import PlotCache
+from city_pollution.services.plot_store import PlotStoreManager
+
+
+def write_plot(plot_cache, name, size, mtime):
+    path = plot_cache.path(name)
+    path.write_bytes(b"0" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_plot_store_evicts_old_and_least_recently_served(tmp_path):
+    now = 100_000.0
+    plot_cache = PlotCache(tmp_path)
+    manager = PlotStoreManager(
+        plot_cache, max_bytes=25, max_age=1000, clock=lambda: now
+    )
+
+    expired = write_plot(plot_cache, "1_expired.png", 10, now - 2000)
+    served = write_plot(plot_cache, "1_served.png", 10, now - 500)
+    rendered = write_plot(plot_cache, "1_rendered.png", 10, now - 400)
+    newest = write_plot(plot_cache, "2_newest.png", 10, now - 10)
+    leftover = tmp_path / ".1_leftover.png.tmp"
+    leftover.write_bytes(b"0")
+    os.utime(leftover, (now - 1000, now - 1000))
+    # serving a plot makes it recently used even though it was rendered earlier
+    plot_cache.last_served["1_served.png"] = now - 5
+
+    assert manager.evict() == 2
+
+    assert not expired.exists()
+    assert not rendered.exists()
+    assert not leftover.exists()
+    assert served.exists() and newest.exists()
+    assert manager.stats()["files"] == 2
+    assert manager.stats()["size_bytes"] == 20
+    assert manager.stats()["evictions"] == 2
+    assert manager.stats()["evicted_bytes"] == 20
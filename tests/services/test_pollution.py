@@ -1,14 +1,18 @@
+import asyncio
 from dataclasses import asdict
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 
+import pandas as pd
 import pytest
 
 from city_pollution.entities.pollution import Pollution
-from city_pollution.schemas.pollution import Aggregate
+from city_pollution.schemas.pollution import Aggregate, Dates, PollutionSchema
 from city_pollution.services.pollution import (
+    PollutionService,
     pollution_to_dataframe,
     aggregated_pollutions,
 )
+from city_pollution.services.plot_cache import PlotCache
 from tests.repositories.pollution import PollutionFactory
 
 
@@ -159,3 +163,183 @@ async def test_aggr_pollution_to_dataframe():
     last_dt = last_dt.date()
     assert first_dt == date(2021, 1, 1)
     assert last_dt == date(2023, 1, 1)
+
+
+def test_missing_date_ranges():
+    service = PollutionService()
+    existing = {date(2024, 1, 3), date(2024, 1, 4), date(2024, 1, 7)}
+
+    ranges = service.missing_date_ranges(date(2024, 1, 1), date(2024, 1, 8), existing)
+
+    assert ranges == [
+        (date(2024, 1, 1), date(2024, 1, 2)),
+        (date(2024, 1, 5), date(2024, 1, 6)),
+        (date(2024, 1, 8), date(2024, 1, 8)),
+    ]
+    assert (
+        service.missing_date_ranges(date(2024, 1, 3), date(2024, 1, 4), existing) == []
+    )
+
+
+class FakeOpenWeatherService:
+    def __init__(self):
+        self.ranges = []
+
+    async def get_pollution_data_ranges(self, lat, lon, ranges):
+        self.ranges.extend(ranges)
+        return [
+            {
+                "co": 1.0,
+                "no": 1.0,
+                "no2": 1.0,
+                "o3": 1.0,
+                "so2": 1.0,
+                "pm2_5": 1.0,
+                "pm10": 1.0,
+                "nh3": 1.0,
+                "timestamp": ts,
+            }
+            for start, end in ranges
+            for ts in range(start, end, 3600)
+        ]
+
+
+@pytest.mark.asyncio
+async def test_incremental_import_fetches_missing_dates(
+    mock_pollution_repository, mock_city_repository
+):
+    openweather_service = FakeOpenWeatherService()
+    service = PollutionService(openweather_service)
+    params = PollutionSchema(
+        lat=40.53,
+        lon=-74.56,
+        name="San Francisco",
+        dates=Dates(start=date(2023, 12, 31), end=date(2024, 1, 3)),
+    )
+
+    result = await service.import_historical_pollution(params, None)
+
+    assert "success" in result
+    # 1st and 2nd of Jan 2024 are already stored for San Francisco
+    assert [
+        tuple(datetime.fromtimestamp(ts, timezone.utc).date() for ts in r)
+        for r in openweather_service.ranges
+    ] == [
+        (date(2023, 12, 31), date(2023, 12, 31)),
+        (date(2024, 1, 3), date(2024, 1, 3)),
+    ]
+
+
+def test_pandas_to_rows_matches_dataclasses():
+    service = PollutionService()
+    pollutions = [
+        PollutionFactory.create(date(2024, 1, 1), 1),
+        PollutionFactory.create(date(2024, 1, 2), 1),
+    ]
+    for pollution in pollutions:
+        pollution.id = None
+    df = pd.DataFrame(pollutions)
+
+    rows = service.pandas_to_rows(df, 1)
+
+    assert [Pollution(**row) for row in rows] == service.pandas_to_dataclasses(df, 1)
+    assert rows[0]["date"] == date(2024, 1, 1)
+    assert rows[0]["city_id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pollution_plot_is_cached_until_invalidated(
+    mock_pollution_repository, mock_city_repository, mocker, tmp_path
+):
+    plot_cache = PlotCache(tmp_path)
+    service = PollutionService(plot_cache=plot_cache)
+    render = mocker.spy(service.plot_renderer, "render")
+    dates = Dates(start=date(2024, 1, 1), end=date(2024, 1, 2))
+
+    first = await service.get_pollution_data_service(Aggregate.DAILY, 1, dates, None)
+    second = await service.get_pollution_data_service(Aggregate.DAILY, 1, dates, None)
+    assert first.plot_url == second.plot_url
+    # plots are only rendered when their URL is requested
+    assert render.call_count == 0
+
+    plot_filename = first.plot_url.rsplit("/", 1)[1]
+    path = await service.render_plot(plot_filename, None)
+    assert await service.render_plot(plot_filename, None) == path
+    assert render.call_count == 1
+    assert list(tmp_path.glob("1_*.png")) == [path]
+
+    # data versions are stored, the URL stays valid after a restart
+    path.unlink()
+    restarted = PollutionService(plot_cache=PlotCache(tmp_path))
+    assert await restarted.render_plot(plot_filename, None) == path
+
+    await service.delete_pollution_data_service(1, dates, None)
+    assert list(tmp_path.glob("1_*.png")) == []
+    # the old URL is outdated once the city's data changed
+    assert await service.render_plot(plot_filename, None) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_plot_requests_share_one_render(
+    mock_pollution_repository, mock_city_repository, mocker, tmp_path
+):
+    service = PollutionService(plot_cache=PlotCache(tmp_path))
+    render = mocker.spy(service.plot_renderer, "render")
+    dates = Dates(start=date(2024, 1, 1), end=date(2024, 1, 2))
+    result = await service.get_pollution_data_service(Aggregate.DAILY, 1, dates, None)
+    plot_filename = result.plot_url.rsplit("/", 1)[1]
+
+    paths = await asyncio.gather(
+        *[service.render_plot(plot_filename, None) for _ in range(3)]
+    )
+
+    assert paths[0] is not None and paths.count(paths[0]) == 3
+    assert render.call_count == 1
+    assert service._single_flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_are_coalesced(
+    mock_pollution_repository, mock_city_repository, mocker
+):
+    service = PollutionService()
+    load_pollution = mocker.spy(service, "load_pollution")
+    dates = Dates(start=date(2024, 1, 1), end=date(2024, 1, 2))
+
+    results = await asyncio.gather(
+        *(
+            service.get_pollution_data_service(Aggregate.DAILY, 1, dates, None)
+            for _ in range(5)
+        ),
+        service.get_pollution_data_service(Aggregate.MONTHLY, 1, dates, None),
+    )
+
+    assert all(x is results[0] for x in results[:5])
+    assert load_pollution.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_imports_are_coalesced(
+    mock_pollution_repository, mock_city_repository
+):
+    class SlowOpenWeatherService(FakeOpenWeatherService):
+        async def get_pollution_data_ranges(self, lat, lon, ranges):
+            await asyncio.sleep(0.01)
+            return await super().get_pollution_data_ranges(lat, lon, ranges)
+
+    openweather_service = SlowOpenWeatherService()
+    service = PollutionService(openweather_service)
+    params = PollutionSchema(
+        lat=40.53,
+        lon=-74.56,
+        name="San Francisco",
+        dates=Dates(start=date(2023, 12, 30), end=date(2023, 12, 31)),
+    )
+
+    results = await asyncio.gather(
+        *(service.import_historical_pollution(params, None) for _ in range(3))
+    )
+
+    assert all("success" in x for x in results)
+    # the missing range was fetched by a single import
+    assert len(openweather_service.ranges) == 1
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from city_pollution.services.single_flight import SingleFlight
+
+
+class SlowCall:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_run_once():
+    single_flight = SingleFlight()
+    call = SlowCall(result=42)
+
+    results = await asyncio.gather(*(single_flight.run("key", call) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert call.calls == 1
+    assert single_flight.in_flight() == 0
+
+    # finished calls aren't cached
+    assert await single_flight.run("key", call) == 42
+    assert call.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_calls_with_different_keys_run_separately():
+    single_flight = SingleFlight()
+    call = SlowCall(result=1)
+
+    await asyncio.gather(single_flight.run("a", call), single_flight.run("b", call))
+
+    assert call.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared():
+    single_flight = SingleFlight()
+    call = SlowCall(error=ValueError("City not found"))
+
+    results = await asyncio.gather(
+        *(single_flight.run("key", call) for _ in range(3)), return_exceptions=True
+    )
+
+    assert [type(x) for x in results] == [ValueError] * 3
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_caller_cancelled_keeps_call_running():
+    single_flight = SingleFlight()
+    call = SlowCall(result=42)
+
+    first = asyncio.ensure_future(single_flight.run("key", call))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(single_flight.run("key", call))
+    await asyncio.sleep(0)
+    second.cancel()
+
+    assert await first == 42
+    assert second.cancelled()
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_first_caller_cancelled_reruns_call():
+    single_flight = SingleFlight()
+    call = SlowCall(result=42)
+
+    first = asyncio.ensure_future(single_flight.run("key", call))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(single_flight.run("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == 42
+    assert first.cancelled()
+    assert call.calls == 2
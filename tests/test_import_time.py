@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+# Loaded by the code paths that need them, never at startup
+HEAVY_MODULES = ("pandas", "matplotlib", "opencage", "pyarrow")
+# Cumulative import time of city_pollution.main in microseconds, only checked
+# when set, wall-clock timings are too noisy on shared CI runners
+IMPORT_TIME_BUDGET_US = os.environ.get("IMPORT_TIME_BUDGET_US")
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time per module, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_startup_imports():
+    times = import_times("city_pollution.main")
+
+    heavy = sorted(x for x in times if x.split(".")[0] in HEAVY_MODULES)
+    assert heavy == [], f"imported at startup: {heavy}"
+
+
+@pytest.mark.skipif(
+    IMPORT_TIME_BUDGET_US is None, reason="set IMPORT_TIME_BUDGET_US to check"
+)
+def test_startup_import_time():
+    times = import_times("city_pollution.main")
+
+    assert times["city_pollution.main"] < int(IMPORT_TIME_BUDGET_US)
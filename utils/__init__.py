@@ -1,3 +1,3 @@
-from city_pollution.utils.plotting import generate_pollution_plot
+from utils.plotting import generate_pollution_plot
 
 __all__ = ["generate_pollution_plot"]
@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 import uuid
 
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 import pandas as pd
 
@@ -50,32 +50,33 @@ def generate_pollution_plot(
     # Sort by date
     df = df.sort_values('date')
     
-    # Create the plot
-    fig = plt.figure(figsize=(12, 8))
+    # Create the plot with the Figure API and the Agg canvas, pyplot keeps
+    # global state and isn't safe to use from threads or worker processes
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    top, bottom = fig.subplots(2, 1)
     
     # Plot each pollutant
-    plt.subplot(2, 1, 1)
     for col in ['co', 'no', 'no2', 'o3']:
         if col in df.columns and df[col].notna().any():  # Check if column exists and has data
-            plt.plot(df['date'], df[col], label=col.upper())
+            top.plot(df['date'], df[col], label=col.upper())
     
-    plt.title(f"Pollution Data for {city.name}, {city.country}"
-              f"{f' ({start_date} to {end_date})' if start_date and end_date else ''}")
-    plt.ylabel("Concentration")
-    plt.grid(True, linestyle='--', alpha=0.7)
-    plt.legend()
+    top.set_title(f"Pollution Data for {city.name}, {city.country}"
+                  f"{f' ({start_date} to {end_date})' if start_date and end_date else ''}")
+    top.set_ylabel("Concentration")
+    top.grid(True, linestyle='--', alpha=0.7)
+    top.legend()
     
-    plt.subplot(2, 1, 2)
     for col in ['so2', 'pm2_5', 'pm10', 'nh3']:
         if col in df.columns and df[col].notna().any():  # Check if column exists and has data
-            plt.plot(df['date'], df[col], label=col if col != 'pm2_5' else 'PM2.5')
+            bottom.plot(df['date'], df[col], label=col if col != 'pm2_5' else 'PM2.5')
     
-    plt.xlabel("Date")
-    plt.ylabel("Concentration")
-    plt.grid(True, linestyle='--', alpha=0.7)
-    plt.legend()
+    bottom.set_xlabel("Date")
+    bottom.set_ylabel("Concentration")
+    bottom.grid(True, linestyle='--', alpha=0.7)
+    bottom.legend()
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Ensure the output directory exists
     os.makedirs(plot_dir, exist_ok=True)
@@ -84,9 +85,8 @@ def generate_pollution_plot(
     filename = f"pollution_{city.name.lower().replace(' ', '_')}_{uuid.uuid4().hex[:8]}.png"
     filepath = os.path.join(plot_dir, filename)
     
-    # Save the plot
-    plt.savefig(filepath)
-    plt.close(fig)  # Close the figure to free memory
+    # Save the plot, the figure is freed once it goes out of scope
+    fig.savefig(filepath)
     
     return {
         "filename": filename,